@@ -1,6 +1,9 @@
 """Agent definition that generates a testbench."""
 
 import constants
+import sharding
+import stimulus as stimulus_lib
+import tracing
 import re
 import random
 from pathlib import Path
@@ -11,6 +14,34 @@ import os
 import yaml
 import requests
 import argparse
+import functools
+import queue
+import time
+from concurrent import futures
+
+# Pooled HTTP connections to the model server, reused across prompts and
+# request threads. Sessions are not thread-safe, so each prompt borrows one and
+# puts it back, most recently used first so its connections stay warm.
+_MAX_MODEL_SESSIONS = 4
+_model_sessions = queue.LifoQueue()
+for _ in range(_MAX_MODEL_SESSIONS):
+    _model_sessions.put(requests.Session())
+# Threads running the mutant simulations, kept warm across testbenches
+_simulation_pool = None
+
+
+def time_left(deadline):
+    """Return the seconds left until a time.monotonic() deadline, if any.
+
+    Raises TimeoutError once the deadline has passed.
+    """
+    if deadline is None:
+        return None
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("Testbench generation deadline exceeded.")
+    return remaining
+
 
 def extract_module_header(verilog_str):
     """
@@ -26,7 +57,14 @@ def extract_module_header(verilog_str):
     return match.group(0).strip()
 
 
-def simulate_verilog(golden_str, buggy_str, testbench_str):
+def simulate_verilog(golden_str, buggy_str, testbench_str, num_shards=1, deadline=None):
+    """Simulate a generated testbench, optionally split into parallel shards.
+
+    With num_shards > 1 the testbench is compiled once and `num_shards` vvp
+    processes run concurrently, each with its own +shard plusargs. The
+    outputs are concatenated, so a mismatch reported by any shard shows up in
+    the returned text. Simulations still running at `deadline` are killed.
+    """
     # Create temporary files
     with tempfile.TemporaryDirectory() as tmpdir:
         golden_path = os.path.join(tmpdir, "golden.v")
@@ -43,16 +81,33 @@ def simulate_verilog(golden_str, buggy_str, testbench_str):
             f.write(testbench_str)
 
         # Compile using iverilog
-        subprocess.run(["iverilog", "-o", output_path, testbench_path, golden_path, buggy_path], check=True)
-
-        # Run simulation with vvp
-        result = subprocess.run(["vvp", output_path], capture_output=True, text=True)
-
-        return result.stdout  # or result.stderr if needed
-
-def send_prompt(prompt: str, config: dict) -> str:
+        tracing.run_subprocess(
+            ["iverilog", "-o", output_path, testbench_path, golden_path, buggy_path],
+            check=True, timeout=time_left(deadline),
+        )
+
+        # Run one simulation per shard with vvp
+        queued_at = tracing.now()
+        with futures.ThreadPoolExecutor(max_workers=num_shards) as executor:
+            results = executor.map(
+                lambda shard: tracing.run_subprocess(
+                    ["vvp", output_path] + sharding.shard_plusargs(shard, num_shards),
+                    queued_at=queued_at,
+                    capture_output=True,
+                    text=True,
+                    timeout=time_left(deadline),
+                ),
+                range(num_shards),
+            )
+            outputs = [result.stdout for result in results]
+
+        return "\n".join(outputs)  # or result.stderr if needed
+
+
+def send_prompt(prompt: str, config: dict, deadline=None) -> str:
     """
     Send a single prompt to the model server and return the text response.
+    The request times out at `deadline` if it is earlier than stream_timeout.
     """
     url = f"{config['model_server_base_url']}/workspace/{config['workspace_slug']}/chat"
 
@@ -69,28 +124,56 @@ def send_prompt(prompt: str, config: dict) -> str:
         "attachments": []
     }
 
-    response = requests.post(
-        url,
-        headers=headers,
-        json=payload,
-        timeout=config.get("stream_timeout", 60)
-    )
+    timeout = config.get("stream_timeout", 60)
+    if deadline is not None:
+        timeout = min(timeout, time_left(deadline))
+
+    session = _model_sessions.get()
+    try:
+        response = session.post(
+            url,
+            headers=headers,
+            json=payload,
+            timeout=timeout
+        )
+    finally:
+        _model_sessions.put(session)
     response.raise_for_status()
     data = response.json()
     return data.get("textResponse", "")
 
 
+@functools.cache
 def load_config(path: str = "config.yaml") -> dict:
     """
     Load YAML configuration from the given file path.
+    The file is read once per process and path.
     """
     with open(path, "r") as f:
         return yaml.safe_load(f)
 
 
 
+def get_simulation_pool(max_workers=None):
+    """Return the thread pool running simulations, creating it on first use."""
+    global _simulation_pool
+    if _simulation_pool is None:
+        _simulation_pool = futures.ThreadPoolExecutor(max_workers=max_workers or os.cpu_count())
+    return _simulation_pool
+
+
 def parse_verilog_module_from_string(content):
-    """Parse a Verilog string to extract module name, inputs, and outputs."""
+    """Parse a Verilog string to extract module name, inputs, and outputs.
+
+    Results are cached by source text, each caller gets its own copy of the
+    port dictionaries.
+    """
+    module_name, inputs, outputs = _parse_verilog_module_cached(content)
+    return module_name, dict(inputs), dict(outputs)
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_verilog_module_cached(content):
     # Extract module name
     module_match = re.search(r'module\s+(\w+)', content)
     if not module_match:
@@ -134,8 +217,36 @@ def extract_verilog_module(text: str) -> str:
     raise ValueError("No Verilog module found in the provided text.")
 
 
-def generate_testbench_from_strings(golden_source, buggy_source):
-    """Generate a Verilog testbench as a string to compare two modules."""
+# Above this many stimulus input bits the testbench samples random inputs
+# instead of enumerating them, so that a sweep never simulates longer than the
+# 1000 random vectors at ten time units each: 2**13 combinations at one time
+# unit each for combinational designs, 2**9 clock cycles of ten time units for
+# sequential ones.
+_EXHAUSTIVE_INPUT_WIDTH_THRESHOLD = 13
+_SEQUENTIAL_EXHAUSTIVE_INPUT_WIDTH_THRESHOLD = 9
+
+
+def exhaustive_threshold_for(inputs):
+    """Return the widest stimulus swept exhaustively for a module's inputs."""
+    clock_name, _, _ = _split_inputs(inputs)
+    if clock_name:
+        return _SEQUENTIAL_EXHAUSTIVE_INPUT_WIDTH_THRESHOLD
+    return _EXHAUSTIVE_INPUT_WIDTH_THRESHOLD
+
+
+def generate_testbench_from_strings(
+    golden_source, buggy_source, exhaustive_threshold=None, stimulus=None
+):
+    """Generate a Verilog testbench as a string to compare two modules.
+
+    If the non-clock, non-reset inputs are at most `exhaustive_threshold` bits
+    wide in total, every input combination is applied once (per clock cycle
+    after reset for sequential designs). The threshold defaults to
+    exhaustive_threshold_for the golden inputs. Otherwise the testbench embeds the
+    precomputed random `stimulus`, see generate_stimulus, which is shared by
+    all the mutants of a problem. It is generated from the golden inputs if
+    not given.
+    """
     golden_module, golden_inputs, golden_outputs = parse_verilog_module_from_string(golden_source)
     buggy_module, buggy_inputs, buggy_outputs = parse_verilog_module_from_string(buggy_source)
 
@@ -222,12 +333,46 @@ def generate_testbench_from_strings(golden_source, buggy_source):
         lines.append(f"    forever #5 {clock_name} = ~{clock_name};")
         lines.append("  end\n")
 
+    # Inputs driven by the stimulus, i.e. everything but clock and reset
+    stimulus_inputs = {
+        name: width
+        for name, width in golden_inputs.items()
+        if name not in ["clk", "clock", "rst", "reset"]
+    }
+    stimulus_width = sum(stimulus_inputs.values())
+    # Narrow interfaces are swept exhaustively instead of sampled at random
+    if exhaustive_threshold is None:
+        exhaustive_threshold = exhaustive_threshold_for(golden_inputs)
+    exhaustive = 0 < stimulus_width <= exhaustive_threshold
+    if stimulus is None:
+        stimulus = generate_stimulus(golden_inputs, exhaustive_threshold=exhaustive_threshold)
+    num_tests = stimulus.num_vectors
+
     # Begin test logic
     lines.append("  integer errors = 0;")
-    lines.append("  integer num_tests = 1000;\n")
+    lines.append(f"  integer num_tests = {num_tests};")
+    lines.append(f"  integer num_blocks = {stimulus.num_blocks};")
+    lines.append(f"  integer block_size = {stimulus.block_size};")
+    lines.append("  integer i;")
+    lines.append("  // With +profile every mismatching vector is reported instead of")
+    lines.append("  // stopping at the first one")
+    lines.append("  reg profile_kills;")
+    lines.append("  // Shard of the stimulus blocks run by this simulation, see simulate_verilog")
+    lines.append("  integer tb_shard, tb_num_shards;\n")
+    if not exhaustive and stimulus.width:
+        lines.append(f"  reg [{stimulus.width-1}:0] stimulus_mem [0:{num_tests-1}];\n")
     lines.append("  initial begin")
+    lines.append(f"    profile_kills = $test$plusargs(\"{constants.PROFILE_PLUSARG}\");")
+    lines.append(f"    if (!$value$plusargs(\"{constants.SHARD_PLUSARG}=%d\", tb_shard)) tb_shard = 0;")
+    lines.append(f"    if (!$value$plusargs(\"{constants.NUM_SHARDS_PLUSARG}=%d\", tb_num_shards)) tb_num_shards = 1;")
     lines.append("    $display(\"Starting equivalence checking...\");")
-    lines.append("    $display(\"Testing random inputs to find discrepancies\");\n")
+    if exhaustive:
+        lines.append("    $display(\"Testing all input combinations to find discrepancies\");\n")
+    else:
+        lines.append("    $display(\"Testing random inputs to find discrepancies\");")
+        if stimulus.width:
+            lines.extend(_memory_lines("stimulus_mem", stimulus.words, stimulus.width))
+        lines.append("")
 
     # Reset logic if needed
     reset_name = None
@@ -236,23 +381,32 @@ def generate_testbench_from_strings(golden_source, buggy_source):
     elif "reset" in golden_inputs:
         reset_name = "reset"
     
+    # Every block starts from reset and each shard runs its share of the
+    # blocks, so a vector sees the same history whatever the number of shards
+    lines.append("    for (int tb_block = tb_shard; tb_block < num_blocks; tb_block = tb_block + tb_num_shards) begin")
     if reset_name:
-        lines.append(f"    // Reset sequence")
-        lines.append(f"    {reset_name} = 1;")
-        lines.append(f"    #20;")
-        lines.append(f"    {reset_name} = 0;")
-        lines.append(f"    #10;\n")
-
-    # Random input loop
-    lines.append("    for (int i = 0; i < num_tests; i++) begin")
-    lines.append("      // Generate random inputs")
-    for name, width in golden_inputs.items():
-        if name not in ["clk", "clock", "rst", "reset"]:
-            if width > 32:
-                lines.append(f"      {name} = $urandom & {(1 << width) - 1};")
-            else:
-                lines.append(f"      {name} = $urandom;")
-    lines.append("\n      #10; // Wait for outputs to stabilize\n")
+        lines.append(f"      // Reset sequence")
+        lines.append(f"      {reset_name} = 1;")
+        lines.append(f"      #20;")
+        lines.append(f"      {reset_name} = 0;")
+        lines.append(f"      #10;\n")
+    lines.append("      for (int j = 0; j < block_size && tb_block * block_size + j < num_tests; j++) begin")
+    block_body_start = len(lines)
+    lines.append("      i = tb_block * block_size + j;")
+    if exhaustive:
+        # Exhaustive input loop, one combination per clock cycle for
+        # sequential designs and one per time unit for combinational ones.
+        lines.append("      // Apply the next input combination")
+        lines.append(f"      {{{', '.join(stimulus_inputs)}}} = i;")
+        if clock_name:
+            lines.append("\n      #10; // Wait for the next clock edge\n")
+        else:
+            lines.append("\n      #1; // Wait for outputs to stabilize\n")
+    else:
+        lines.append("      // Apply the next precomputed random vector")
+        if stimulus.width:
+            lines.append(f"      {{{', '.join(stimulus.ports)}}} = stimulus_mem[i];")
+        lines.append("\n      #10; // Wait for outputs to stabilize\n")
 
     # Compare outputs
     lines.append("      // Compare outputs")
@@ -266,9 +420,19 @@ def generate_testbench_from_strings(golden_source, buggy_source):
         lines.append(f"        $display(\"  Golden output: {name} = %h\", {name}_golden);")
         lines.append(f"        $display(\"  Buggy output:  {name} = %h\", {name}_buggy);")
         lines.append("        errors = errors + 1;")
-        lines.append("        $finish;")
+        lines.append("        if (profile_kills)")
+        lines.append(f"          $display(\"{constants.PROFILE_KILL_TAG} vector=%0d time=%0t output={name}\", i, $time);")
+        lines.append("        else")
+        lines.append("          $finish;")
         lines.append("      end")
+    lines[block_body_start:] = [
+        "\n".join("  " + part if part else part for part in line.split("\n"))
+        for line in lines[block_body_start:]
+    ]
+    lines.append("      end")
     lines.append("    end\n")
+    lines.append("    if (profile_kills)")
+    lines.append(f"      $display(\"{constants.PROFILE_VECTORS_TAG} count=%0d\", num_tests);")
 
     lines.append("    if (errors == 0) begin")
     lines.append("      $display(\"No discrepancies found after %0d tests.\", num_tests);")
@@ -282,6 +446,260 @@ def generate_testbench_from_strings(golden_source, buggy_source):
 
     return "\n".join(lines)
 
+# Number of random vectors per stimulus block when the inputs are too wide for
+# an exhaustive sweep
+_NUM_RANDOM_VECTORS = 1000
+# Probability of a reset pulse on a random vector of a design with a reset,
+# about ten resets per 1000 vectors
+_RESET_PROBABILITY = 0.01
+
+
+def _split_inputs(inputs):
+    """Split module inputs into clock name, reset name and stimulus inputs."""
+    clock_name = next((name for name in ["clk", "clock"] if name in inputs), None)
+    reset_name = next((name for name in ["rst", "reset"] if name in inputs), None)
+    stimulus_inputs = {
+        name: width
+        for name, width in inputs.items()
+        if name not in ["clk", "clock", "rst", "reset"]
+    }
+    return clock_name, reset_name, stimulus_inputs
+
+
+def generate_stimulus(inputs, num_vectors=_NUM_RANDOM_VECTORS, num_blocks=1,
+                      exhaustive_threshold=None, reset_probability=_RESET_PROBABILITY):
+    """Precompute a stimulus_lib.Stimulus for the non-clock inputs.
+
+    Each vector packs the driven inputs in declaration order, first input in
+    the most significant bits. Interfaces at most `exhaustive_threshold` bits
+    wide, exhaustive_threshold_for the inputs by default, get every combination
+    of the non-reset inputs split into `num_blocks` blocks. Others get
+    `num_blocks` blocks of `num_vectors` random vectors each. Random vectors drive
+    valid/ready handshakes and occasional resets, which then come last in the
+    packing order.
+    """
+    _, reset_name, stimulus_inputs = _split_inputs(inputs)
+    width = sum(stimulus_inputs.values())
+    if exhaustive_threshold is None:
+        exhaustive_threshold = exhaustive_threshold_for(inputs)
+    if 0 < width <= exhaustive_threshold:
+        return stimulus_lib.exhaustive_stimulus(stimulus_inputs, num_blocks)
+    return stimulus_lib.random_stimulus(
+        stimulus_inputs, num_vectors, num_blocks,
+        reset_name=reset_name, reset_probability=reset_probability,
+    )
+
+
+def write_memory_file(path, words, width):
+    """Write words as a $readmemh file, one zero-padded hex word per line."""
+    digits = max(1, (width + 3) // 4)
+    with open(path, 'w') as f:
+        for word in words:
+            f.write(f"{word:0{digits}x}\n" if isinstance(word, int) else f"{word}\n")
+
+
+def _memory_lines(name, words, width):
+    """Initialize a memory from a $readmemh file path or from a list of words."""
+    if isinstance(words, (str, Path)):
+        return [f"    $readmemh(\"{words}\", {name});"]
+    digits = max(1, (width + 3) // 4)
+    return [
+        f"    {name}[{index}] = {width}'h{word:0{digits}x};"
+        if isinstance(word, int) else f"    {name}[{index}] = {width}'h{word};"
+        for index, word in enumerate(words)
+    ]
+
+
+def generate_replay_testbench(dut_source, num_vectors, stimulus, expected=None, trace_file=None,
+                              stimulus_ports=None):
+    """Generate a testbench that drives precomputed stimulus into a single DUT.
+
+    `stimulus` and `expected` are either the path of a $readmemh file or the
+    list of words to embed in the testbench. `stimulus_ports` is the packing
+    order of the stimulus words, the non-clock, non-reset inputs by default. With `trace_file` the testbench
+    records the packed DUT outputs after every vector to that file, otherwise
+    it compares them against `expected` and prints the pass string if all
+    vectors match. The expected words may hold x/z digits.
+    """
+    module_name, inputs, outputs = parse_verilog_module_from_string(dut_source)
+    clock_name, reset_name, stimulus_inputs = _split_inputs(inputs)
+    if stimulus_ports is None:
+        stimulus_ports = stimulus_inputs
+    stimulus_width = sum(inputs[name] for name in stimulus_ports)
+    output_width = sum(outputs.values())
+    packed_outputs = "{" + ", ".join(outputs) + "}"
+
+    lines = []
+    lines.append("`timescale 1ns/1ps\n")
+    lines.append(f"module {constants.TESTBENCH_MODULE_NAME};\n")
+
+    for name, width in inputs.items():
+        if width == 1:
+            lines.append(f"  reg {name};")
+        else:
+            lines.append(f"  reg [{width-1}:0] {name};")
+    for name, width in outputs.items():
+        if width == 1:
+            lines.append(f"  wire {name};")
+        else:
+            lines.append(f"  wire [{width-1}:0] {name};")
+    lines.append("")
+
+    if stimulus_width:
+        lines.append(f"  reg [{stimulus_width-1}:0] stimulus_mem [0:{num_vectors-1}];")
+    if trace_file is None:
+        lines.append(f"  reg [{output_width-1}:0] expected_mem [0:{num_vectors-1}];")
+    else:
+        lines.append("  integer trace_fd;")
+    lines.append("  integer errors = 0;")
+    lines.append(f"  integer num_tests = {num_vectors};")
+    lines.append("  reg profile_kills;\n")
+
+    lines.append(f"  {module_name} dut_inst (")
+    lines.append(",\n".join(f"    .{name}({name})" for name in list(inputs) + list(outputs)))
+    lines.append("  );\n")
+
+    if clock_name:
+        lines.append("  // Clock generation")
+        lines.append("  initial begin")
+        lines.append(f"    {clock_name} = 0;")
+        lines.append(f"    forever #5 {clock_name} = ~{clock_name};")
+        lines.append("  end\n")
+
+    lines.append("  initial begin")
+    lines.append(f"    profile_kills = $test$plusargs(\"{constants.PROFILE_PLUSARG}\");")
+    if stimulus_width:
+        lines.extend(_memory_lines("stimulus_mem", stimulus, stimulus_width))
+    if trace_file is None:
+        lines.extend(_memory_lines("expected_mem", expected, output_width))
+    else:
+        lines.append(f"    trace_fd = $fopen(\"{trace_file}\", \"w\");")
+    lines.append("")
+
+    if reset_name:
+        lines.append("    // Reset sequence")
+        lines.append(f"    {reset_name} = 1;")
+        lines.append("    #20;")
+        lines.append(f"    {reset_name} = 0;")
+        lines.append("    #10;\n")
+
+    lines.append("    for (int i = 0; i < num_tests; i++) begin")
+    if stimulus_width:
+        lines.append(f"      {{{', '.join(stimulus_ports)}}} = stimulus_mem[i];")
+    if clock_name:
+        lines.append("      #10; // Wait for the next clock edge")
+    else:
+        lines.append("      #1; // Wait for outputs to stabilize")
+    if trace_file is None:
+        lines.append(f"      if ({packed_outputs} !== expected_mem[i]) begin")
+        lines.append("        $display(\"Mismatch found at vector %0d, time %t!\", i, $time);")
+        lines.append("        $display(\"  Expected outputs: %h\", expected_mem[i]);")
+        lines.append(f"        $display(\"  Actual outputs:   %h\", {packed_outputs});")
+        lines.append("        errors = errors + 1;")
+        lines.append("        if (profile_kills)")
+        lines.append(f"          $display(\"{constants.PROFILE_KILL_TAG} vector=%0d time=%0t output=all\", i, $time);")
+        lines.append("        else")
+        lines.append("          $finish;")
+        lines.append("      end")
+    else:
+        lines.append(f"      $fwrite(trace_fd, \"%h\\n\", {packed_outputs});")
+    lines.append("    end\n")
+
+    if trace_file is None:
+        lines.append("    if (profile_kills)")
+        lines.append(f"      $display(\"{constants.PROFILE_VECTORS_TAG} count=%0d\", num_tests);")
+        lines.append("    if (errors == 0)")
+        lines.append(f"      $display(\"{constants.TEST_PASS_STRING}\");")
+    else:
+        lines.append("    $fclose(trace_fd);")
+    lines.append("    $finish;")
+    lines.append("  end\n")
+    lines.append("endmodule")
+
+    return "\n".join(lines)
+
+
+def simulate_single_dut(dut_str, testbench_str, deadline=None):
+    """Simulate a testbench that instantiates a single DUT and return stdout."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dut_path = os.path.join(tmpdir, "dut.v")
+        testbench_path = os.path.join(tmpdir, "testbench.v")
+        output_path = os.path.join(tmpdir, "tb.out")
+        with open(dut_path, 'w') as f:
+            f.write(dut_str)
+        with open(testbench_path, 'w') as f:
+            f.write(testbench_str)
+        tracing.run_subprocess(
+            ["iverilog", "-g2012", "-o", output_path, testbench_path, dut_path],
+            check=True, timeout=time_left(deadline),
+        )
+        result = tracing.run_subprocess(
+            ["vvp", output_path], capture_output=True, text=True, timeout=time_left(deadline)
+        )
+        return result.stdout
+
+
+def record_golden_trace(golden_str, stimulus_path, num_vectors, stimulus_ports=None, deadline=None):
+    """Simulate the golden module once and return its per-vector output words."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        trace_path = os.path.join(tmpdir, "trace.hex")
+        recorder = generate_replay_testbench(
+            golden_str, num_vectors, stimulus_path, trace_file=trace_path, stimulus_ports=stimulus_ports
+        )
+        simulate_single_dut(golden_str, recorder, deadline)
+        with open(trace_path) as f:
+            return [line.strip() for line in f if line.strip()]
+
+
+def generate_trace_replay_testbench(golden_file, file_name_to_content, deadline=None):
+    """Check every mutant against a golden trace recorded once.
+
+    The golden module is simulated a single time and each mutant is run with a
+    checker that replays the stimulus without instantiating the golden. The
+    returned testbench embeds the stimulus and the trace, so it does not depend
+    on the mutant it is selected for.
+    """
+    _, inputs, outputs = parse_verilog_module_from_string(golden_file)
+    stimulus = generate_stimulus(inputs)
+    num_vectors = stimulus.num_vectors
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        stimulus_path = os.path.join(tmpdir, "stimulus.hex")
+        trace_path = os.path.join(tmpdir, "trace.hex")
+        stimulus.write(stimulus_path)
+        with tracing.span("record_golden_trace"):
+            trace = record_golden_trace(golden_file, stimulus_path, num_vectors, stimulus.ports, deadline)
+        write_memory_file(trace_path, trace, sum(outputs.values()))
+
+        checker = generate_replay_testbench(
+            golden_file, num_vectors, stimulus_path, trace_path, stimulus_ports=stimulus.ports
+        )
+        mutant_files = [filename for filename in file_name_to_content.keys() if filename[-1] == 'v']
+
+        def simulate(filename, queued_at):
+            with tracing.span("simulate", queued_at=queued_at, mutant=filename):
+                return simulate_single_dut(file_name_to_content[filename], checker, deadline)
+
+        with tracing.span("simulations"):
+            queued_at = tracing.now()
+            sim_outputs = get_simulation_pool().map(
+                lambda filename: simulate(filename, queued_at), mutant_files
+            )
+            passing_mutants = [
+                filename
+                for filename, sim_output in zip(mutant_files, sim_outputs)
+                if constants.TEST_PASS_STRING in sim_output
+            ]
+
+    if not passing_mutants:
+        raise RuntimeError("No mutants matched the golden trace.")
+    print(f"Mutants matching the golden trace: {passing_mutants}")
+
+    return generate_replay_testbench(
+        golden_file, num_vectors, stimulus.words, trace, stimulus_ports=stimulus.ports
+    )
+
+
 # if __name__ == "__main__":
 #     parser = argparse.ArgumentParser(description="Generate a Verilog equivalence checking testbench")
 #     parser.add_argument("golden_file", help="Path to the golden reference Verilog file")
@@ -293,7 +711,17 @@ def generate_testbench_from_strings(golden_source, buggy_source):
 
 
 # TODO: Implement this.
-def generate_testbench(file_name_to_content: dict[str, str]) -> str:
+def generate_testbench(
+    file_name_to_content: dict[str, str], num_shards: int = 1, replay_golden_trace: bool = False,
+    timeout: float | None = None
+) -> str:
+    """Generate a testbench for a problem.
+
+    With `timeout`, the model request and the simulations are cut short once
+    that many seconds have passed, raising TimeoutError or
+    subprocess.TimeoutExpired, so they do not keep the simulation pool busy.
+    """
+    deadline = time.monotonic() + timeout if timeout is not None else None
     spec = file_name_to_content['specification.md']
     file_name_to_content.pop('tb.v')
 
@@ -313,7 +741,8 @@ def generate_testbench(file_name_to_content: dict[str, str]) -> str:
     print("\n\n")
 
     config = load_config("config.yaml")
-    response = send_prompt(prompt, config)
+    with tracing.span("llm_request"):
+        response = send_prompt(prompt, config, deadline)
 
     print("--RESPONSE--\n")
     print(response)
@@ -332,30 +761,48 @@ def generate_testbench(file_name_to_content: dict[str, str]) -> str:
     # send spec file to llm in prompt using the api
     golden_file = module_text # this will be the result of the llm prompt
 
-    # generate all testbenches
+    if replay_golden_trace:
+        return generate_trace_replay_testbench(golden_file, file_name_to_content, deadline)
+
+    # generate all testbenches, sharing one precomputed stimulus
     generated_tbs_dict = {}
-    for filename in file_name_to_content.keys():
-        if filename[-1] == 'v':
-            generated_tbs_dict[filename] = generate_testbench_from_strings(golden_file, file_name_to_content[filename])
+    with tracing.span("testbench_synthesis"):
+        _, golden_inputs, _ = parse_verilog_module_from_string(golden_file)
+        stimulus = generate_stimulus(golden_inputs, num_blocks=num_shards)
+        for filename in file_name_to_content.keys():
+            if filename[-1] == 'v':
+                generated_tbs_dict[filename] = generate_testbench_from_strings(
+                    golden_file, file_name_to_content[filename], stimulus=stimulus
+                )
 
     # simulate each testbench
-    tb_pass_fail = {}
-    for inst in generated_tbs_dict.keys():
-        tb_pass_fail[inst] = simulate_verilog(golden_file, file_name_to_content[inst], generated_tbs_dict[inst])
+    def simulate(inst, queued_at):
+        with tracing.span("simulate", queued_at=queued_at, mutant=inst):
+            return simulate_verilog(
+                golden_file, file_name_to_content[inst], generated_tbs_dict[inst], num_shards, deadline
+            )
+
+    with tracing.span("simulations"):
+        queued_at = tracing.now()
+        sim_outputs = get_simulation_pool().map(
+            lambda inst: simulate(inst, queued_at), generated_tbs_dict.keys()
+        )
+        tb_pass_fail = dict(zip(generated_tbs_dict.keys(), sim_outputs))
     
-    # Filter passing testbenches
-    passing_testbenches = {
-        name: generated_tbs_dict[name]
-        for name, sim_output in tb_pass_fail.items()
-        if "discrepancies found" not in sim_output.lower()
-    }
-
-    if not passing_testbenches:
-        raise RuntimeError("No testbenches passed the simulation checks.")
-
-    # Choose one passing testbench to return
-    selected_tb_name = random.choice(list(passing_testbenches.keys()))
-    selected_testbench = passing_testbenches[selected_tb_name]
+    with tracing.span("selection"):
+        # Filter passing testbenches
+        passing_testbenches = {
+            name: generated_tbs_dict[name]
+            for name, sim_output in tb_pass_fail.items()
+            if "discrepancies found" not in sim_output.lower()
+        }
+
+        if not passing_testbenches:
+            raise RuntimeError("No testbenches passed the simulation checks.")
+
+        # Choose one passing testbench to return
+        selected_tb_name = random.choice(list(passing_testbenches.keys()))
+        selected_testbench = passing_testbenches[selected_tb_name]
 
     print(f"Selected passing testbench: {selected_tb_name}")
     return selected_testbench
\ No newline at end of file
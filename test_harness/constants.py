@@ -2,6 +2,12 @@ TESTBENCH_FILE_NAME = "tb.v"
 TESTBENCH_MODULE_NAME = "tb"
 TEST_PASS_STRING = "TESTS PASSED"
 ANSWER_FILE_NAME = "null_mutant_id.txt"
+PROFILE_PLUSARG = "profile"
+PROFILE_KILL_TAG = "PROFILE_KILL"
+PROFILE_VECTORS_TAG = "PROFILE_VECTORS"
+PROFILE_END_TAG = "PROFILE_END"
+SHARD_PLUSARG = "shard"
+NUM_SHARDS_PLUSARG = "num_shards"
 DUMMY_TESTBENCH = """\
 module tb;
 
@@ -10,7 +10,9 @@ python test_harness/generate_testbenches.py \
 """
 
 from collections.abc import Sequence
+import os
 import pathlib
+import subprocess
 
 from absl import app
 from absl import flags
@@ -18,6 +20,7 @@ from wrapt_timeout_decorator import timeout
 
 import agent
 import constants
+import tracing
 
 
 _PROBLEMS_FOLDER = flags.DEFINE_string(
@@ -26,12 +29,27 @@ _PROBLEMS_FOLDER = flags.DEFINE_string(
     "The path to the problems folder.",
     required=True,
 )
+_NUM_SIMULATION_SHARDS = flags.DEFINE_integer(
+    "num_simulation_shards",
+    1,
+    "Number of stimulus blocks each candidate testbench gets, simulated in parallel.",
+)
+_REPLAY_GOLDEN_TRACE = flags.DEFINE_bool(
+    "replay_golden_trace",
+    False,
+    "Simulate the generated golden module once and check the mutants against "
+    "its recorded output trace instead of simulating it next to every mutant.",
+)
+_TRACE_FILE = flags.DEFINE_string(
+    "trace_file",
+    None,
+    "If set, write a Chrome trace of the generation stages to this file.",
+)
 _TESTBENCH_GENERATION_TIMEOUT_SECONDS = 5 * 60
 
 
-def main(argv: Sequence[str]) -> None:
-    if len(argv) > 1:
-        raise app.UsageError("Too many command-line arguments.")
+def generate_testbenches() -> None:
+    """Generates and writes a testbench for every problem."""
     problems_folder = pathlib.Path(_PROBLEMS_FOLDER.value)
     if not problems_folder.is_dir():
         raise ValueError(
@@ -49,8 +67,16 @@ def main(argv: Sequence[str]) -> None:
             if file.is_file():
                 files_dict[file.name] = file.read_text()
         try:
-            testbench = agent_with_timeout(files_dict)
-        except TimeoutError:
+            with tracing.span("generate_testbench", module=module):
+                testbench = agent_with_timeout(
+                    files_dict,
+                    num_shards=_NUM_SIMULATION_SHARDS.value,
+                    replay_golden_trace=_REPLAY_GOLDEN_TRACE.value,
+                    # The decorator only interrupts this thread, the deadline
+                    # also stops the simulations running on the pool.
+                    timeout=_TESTBENCH_GENERATION_TIMEOUT_SECONDS,
+                )
+        except (TimeoutError, subprocess.TimeoutExpired):
             print(
                 f"Timeout while generating testbench for {module}, using dummy testbench."
             )
@@ -59,5 +85,17 @@ def main(argv: Sequence[str]) -> None:
         testbench_file.write_text(testbench)
 
 
+def main(argv: Sequence[str]) -> None:
+    if len(argv) > 1:
+        raise app.UsageError("Too many command-line arguments.")
+    if _TRACE_FILE.value is not None:
+        tracing.enable(f"generate_testbenches {os.getpid()}")
+    try:
+        generate_testbenches()
+    finally:
+        if _TRACE_FILE.value is not None:
+            tracing.write(_TRACE_FILE.value)
+
+
 if __name__ == "__main__":
     app.run(main)
@@ -0,0 +1,323 @@
+"""Socket-based job queue used to distribute testbench evaluation.
+
+The coordinator owns the queue and serves it with a
+`multiprocessing.managers.BaseManager`, so workers on other hosts only need
+network access to the coordinator and a view of the shared problems folder.
+Workers heartbeat while a job is running; jobs whose worker stops
+heartbeating are put back on the queue.
+
+Anyone who knows the authkey can send pickles to the coordinator, which
+unpickles them, so the queue must only be served on trusted networks.
+"""
+
+import collections
+from collections.abc import Callable
+import hashlib
+import pathlib
+import threading
+import time
+from typing import NamedTuple
+from multiprocessing import managers
+
+import tracing
+
+_POLL_INTERVAL_SECONDS = 0.5
+_MAX_ATTEMPTS = 3
+
+
+class FatalJobError(Exception):
+    """A job failed because of the setup, e.g. out of sync problem folders.
+
+    Retrying such a job or scoring it as a kill would hide the problem, so the
+    coordinator aborts instead.
+    """
+
+
+class Job(NamedTuple):
+    """A single (module, mutant, testbench) simulation to run."""
+
+    module: str
+    mutant_file_name: str
+    tb_hash: str
+
+
+def compute_file_hash(path: pathlib.Path) -> str:
+    """Computes the SHA-256 hex digest of a file.
+
+    Args:
+      path: Path to the file.
+
+    Returns:
+      The hex digest of the file content.
+    """
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def parse_address(address: str) -> tuple[str, int]:
+    """Parses a 'host:port' string.
+
+    Args:
+      address: The address to parse.
+
+    Returns:
+      A (host, port) tuple.
+
+    Raises:
+      ValueError: If the address is not of the form 'host:port'.
+    """
+    host, sep, port = address.rpartition(":")
+    if not sep or not host or not port.isdigit():
+        raise ValueError(f"Invalid queue address {address!r}, expected host:port.")
+    return host, int(port)
+
+
+class JobCoordinator:
+    """Tracks pending, in-flight and finished jobs.
+
+    All methods are called from the manager server threads, so every access to
+    the internal state goes through a single lock.
+    """
+
+    def __init__(self, jobs: list[Job], heartbeat_timeout_seconds: float):
+        self._lock = threading.Lock()
+        self._heartbeat_timeout_seconds = heartbeat_timeout_seconds
+        self._pending = collections.deque(jobs)
+        self._num_jobs = len(jobs)
+        # Wall time at which each pending job was (re-)queued.
+        self._queued_at = dict.fromkeys(jobs, time.time())
+        # Maps job to (worker id, time of the last heartbeat).
+        self._in_flight = {}
+        self._attempts = collections.Counter()
+        self._results = {}
+        self._fatal_error = None
+
+    def get_job(self, worker_id: str) -> tuple[Job, float] | None:
+        """Hands out the next pending job, or None if none is pending.
+
+        Returns:
+          The job and the wall time at which it was queued.
+        """
+        with self._lock:
+            while self._pending:
+                job = self._pending.popleft()
+                if job in self._results:
+                    continue
+                self._in_flight[job] = (worker_id, time.monotonic())
+                self._attempts[job] += 1
+                return job, self._queued_at[job]
+            return None
+
+    def heartbeat(self, worker_id: str, job: Job) -> None:
+        """Records that the worker is still running the given job."""
+        job = Job(*job)
+        with self._lock:
+            owner = self._in_flight.get(job)
+            if owner is not None and owner[0] == worker_id:
+                self._in_flight[job] = (worker_id, time.monotonic())
+
+    def put_result(
+        self,
+        worker_id: str,
+        job: Job,
+        passed: bool,
+        error: str | None = None,
+        fatal: bool = False,
+    ) -> None:
+        """Stores the result of a job.
+
+        Results for jobs that already have a result (e.g. a job that was
+        re-queued and finished twice) are ignored. A job that failed with an
+        error is re-queued until it runs out of attempts, after which the error
+        becomes fatal, as it would abort a local run. Fatal errors are recorded
+        for `fatal_error`.
+        """
+        job = Job(*job)
+        with self._lock:
+            self._in_flight.pop(job, None)
+            if job in self._results:
+                return
+            if error is not None and not fatal:
+                print(f"Worker {worker_id} failed on {job}: {error}")
+                if self._attempts[job] < _MAX_ATTEMPTS:
+                    self._queued_at[job] = time.time()
+                    self._pending.append(job)
+                    return
+                fatal = True
+                error = f"failed {self._attempts[job]} times, last error: {error}"
+            if fatal:
+                print(f"Worker {worker_id} hit a fatal error on {job}: {error}")
+                if self._fatal_error is None:
+                    self._fatal_error = f"{job}: {error}"
+                return
+            self._results[job] = passed
+
+    def requeue_lost_jobs(self) -> list[Job]:
+        """Re-queues in-flight jobs whose worker stopped heartbeating.
+
+        Returns:
+          The jobs that were re-queued.
+        """
+        now = time.monotonic()
+        lost = []
+        with self._lock:
+            for job, (worker_id, last_seen) in list(self._in_flight.items()):
+                if now - last_seen > self._heartbeat_timeout_seconds:
+                    print(f"Lost heartbeat from worker {worker_id}, re-queueing {job}")
+                    del self._in_flight[job]
+                    self._queued_at[job] = time.time()
+                    self._pending.append(job)
+                    lost.append(job)
+        return lost
+
+    def fatal_error(self) -> str | None:
+        """Returns the first fatal error reported by a worker, if any."""
+        with self._lock:
+            return self._fatal_error
+
+    def is_finished(self) -> bool:
+        """Returns whether every job has a result."""
+        with self._lock:
+            return len(self._results) == self._num_jobs
+
+    def num_finished(self) -> int:
+        """Returns the number of jobs that have a result."""
+        with self._lock:
+            return len(self._results)
+
+    def results(self) -> dict[Job, bool]:
+        """Returns a copy of the results collected so far."""
+        with self._lock:
+            return dict(self._results)
+
+
+class _QueueClientManager(managers.BaseManager):
+    pass
+
+
+# Workers only know the name of the shared coordinator; the server side
+# registers it with its callable on its own manager class in `serve`.
+_QueueClientManager.register("get_coordinator")
+
+
+def serve(
+    coordinator: JobCoordinator, address: tuple[str, int], authkey: bytes
+) -> None:
+    """Serves the coordinator on the given address from a daemon thread.
+
+    Args:
+      coordinator: The coordinator to expose to workers.
+      address: The (host, port) address to listen on.
+      authkey: Key shared with the workers.
+    """
+
+    class _QueueServerManager(managers.BaseManager):
+        pass
+
+    _QueueServerManager.register("get_coordinator", callable=lambda: coordinator)
+    server = _QueueServerManager(address=address, authkey=authkey).get_server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+
+def wait_for_results(
+    coordinator: JobCoordinator, on_progress: Callable[[int], None] | None = None
+) -> dict[Job, bool]:
+    """Blocks until all jobs have a result, re-queueing lost jobs meanwhile.
+
+    Args:
+      coordinator: The coordinator to wait on.
+      on_progress: Optional callback called with the number of finished jobs
+        whenever it changes.
+
+    Returns:
+      A mapping from job to whether the testbench passed.
+
+    Raises:
+      FatalJobError: If a worker reported a fatal error.
+    """
+    num_finished = -1
+    while not coordinator.is_finished():
+        if (fatal_error := coordinator.fatal_error()) is not None:
+            raise FatalJobError(fatal_error)
+        coordinator.requeue_lost_jobs()
+        if on_progress is not None and coordinator.num_finished() != num_finished:
+            num_finished = coordinator.num_finished()
+            on_progress(num_finished)
+        time.sleep(_POLL_INTERVAL_SECONDS)
+    return coordinator.results()
+
+
+def run_worker(
+    address: tuple[str, int],
+    authkey: bytes,
+    worker_id: str,
+    evaluate: Callable[[Job], bool],
+    heartbeat_interval_seconds: float,
+) -> None:
+    """Pulls jobs from the coordinator until all jobs are finished or one of
+    them failed fatally.
+
+    The job is evaluated on a separate thread while the calling thread sends
+    heartbeats, so long simulations are not mistaken for lost workers.
+
+    Args:
+      address: The (host, port) address of the coordinator.
+      authkey: Key shared with the coordinator.
+      worker_id: Identifier reported to the coordinator.
+      evaluate: Function that runs a job and returns whether the test passed.
+        Exceptions are reported to the coordinator as job errors, and
+        FatalJobError as fatal ones.
+      heartbeat_interval_seconds: Time between two heartbeats.
+    """
+    manager = _QueueClientManager(address=address, authkey=authkey)
+    manager.connect()
+    coordinator = manager.get_coordinator()
+
+    while True:
+        try:
+            queued_job = coordinator.get_job(worker_id)
+            if queued_job is None:
+                if coordinator.is_finished() or coordinator.fatal_error():
+                    return
+                time.sleep(_POLL_INTERVAL_SECONDS)
+                continue
+        except (ConnectionError, EOFError):
+            # The coordinator is gone, there is nothing left to do.
+            return
+        job, queued_at = queued_job
+
+        outcome = {}
+
+        def _run(job=job, queued_at=queued_at, outcome=outcome):
+            try:
+                with tracing.span(
+                    "job",
+                    category="job",
+                    queued_at=queued_at,
+                    module=job.module,
+                    mutant=job.mutant_file_name,
+                ):
+                    outcome["passed"] = evaluate(job)
+            except FatalJobError as e:
+                outcome["error"] = str(e)
+                outcome["fatal"] = True
+            except Exception as e:  # pylint: disable=broad-except
+                outcome["error"] = f"{type(e).__name__}: {e}"
+
+        thread = threading.Thread(target=_run, daemon=True)
+        thread.start()
+        try:
+            while thread.is_alive():
+                thread.join(heartbeat_interval_seconds)
+                if thread.is_alive():
+                    coordinator.heartbeat(worker_id, job)
+            coordinator.put_result(
+                worker_id,
+                job,
+                outcome.get("passed", False),
+                outcome.get("error"),
+                outcome.get("fatal", False),
+            )
+            if outcome.get("fatal"):
+                return
+        except (ConnectionError, EOFError):
+            return
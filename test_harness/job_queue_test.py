@@ -0,0 +1,167 @@
+"""Tests for job_queue.
+
+Run from the test_harness folder:
+python job_queue_test.py
+"""
+
+import collections
+import multiprocessing
+import socket
+import threading
+import time
+
+from absl.testing import absltest
+
+import job_queue
+
+_AUTHKEY = b"job_queue_test"
+_HEARTBEAT_INTERVAL_SECONDS = 0.1
+_HEARTBEAT_TIMEOUT_SECONDS = 1.0
+_TIMEOUT_SECONDS = 30
+
+_JOBS = [job_queue.Job("module", f"mutant_{i}.v", "hash") for i in range(12)]
+
+
+def _mutant_index(job: job_queue.Job) -> int:
+    return int(job.mutant_file_name.removeprefix("mutant_").removesuffix(".v"))
+
+
+def _passes_on_even_mutants(job: job_queue.Job) -> bool:
+    time.sleep(0.01)
+    return _mutant_index(job) % 2 == 0
+
+
+def _hangs(job: job_queue.Job) -> bool:
+    del job
+    time.sleep(3600)
+    return True
+
+
+def _free_address() -> tuple[str, int]:
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()
+
+
+def _wait_until(condition, timeout_seconds: float = _TIMEOUT_SECONDS) -> None:
+    deadline = time.monotonic() + timeout_seconds
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError("Condition not met in time.")
+        time.sleep(0.05)
+
+
+class JobQueueTest(absltest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.address = _free_address()
+        self.coordinator = job_queue.JobCoordinator(_JOBS, _HEARTBEAT_TIMEOUT_SECONDS)
+        job_queue.serve(self.coordinator, self.address, _AUTHKEY)
+
+    def _start_thread_worker(self, worker_id, evaluate) -> threading.Thread:
+        thread = threading.Thread(
+            target=job_queue.run_worker,
+            args=(
+                self.address,
+                _AUTHKEY,
+                worker_id,
+                evaluate,
+                _HEARTBEAT_INTERVAL_SECONDS,
+            ),
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def _start_process_worker(self, worker_id, evaluate) -> multiprocessing.Process:
+        process = multiprocessing.get_context("fork").Process(
+            target=job_queue.run_worker,
+            args=(
+                self.address,
+                _AUTHKEY,
+                worker_id,
+                evaluate,
+                _HEARTBEAT_INTERVAL_SECONDS,
+            ),
+            daemon=True,
+        )
+        process.start()
+        self.addCleanup(process.kill)
+        return process
+
+    def _expected_results(self) -> dict[job_queue.Job, bool]:
+        return {job: _passes_on_even_mutants(job) for job in _JOBS}
+
+    def test_workers_finish_all_jobs(self):
+        workers = [
+            self._start_process_worker(f"worker_{i}", _passes_on_even_mutants)
+            for i in range(3)
+        ]
+        results = job_queue.wait_for_results(self.coordinator)
+        self.assertEqual(results, self._expected_results())
+        for worker in workers:
+            worker.join(_TIMEOUT_SECONDS)
+            self.assertEqual(worker.exitcode, 0)
+
+    def test_job_of_killed_worker_is_requeued(self):
+        hanging_worker = self._start_process_worker("hanging_worker", _hangs)
+        _wait_until(lambda: self.coordinator._in_flight)
+        (lost_job,) = self.coordinator._in_flight
+        hanging_worker.kill()
+        hanging_worker.join(_TIMEOUT_SECONDS)
+
+        self._start_process_worker("worker", _passes_on_even_mutants)
+        results = job_queue.wait_for_results(self.coordinator)
+        self.assertEqual(results, self._expected_results())
+        self.assertEqual(self.coordinator._attempts[lost_job], 2)
+
+    def test_failed_job_is_retried(self):
+        lock = threading.Lock()
+        attempts = collections.Counter()
+
+        def fails_once(job):
+            with lock:
+                attempts[job] += 1
+                if attempts[job] == 1:
+                    raise RuntimeError("Transient failure.")
+            return _passes_on_even_mutants(job)
+
+        for i in range(2):
+            self._start_thread_worker(f"worker_{i}", fails_once)
+        results = job_queue.wait_for_results(self.coordinator)
+        self.assertEqual(results, self._expected_results())
+        self.assertEqual(attempts, dict.fromkeys(_JOBS, 2))
+
+    def test_persistent_error_is_fatal(self):
+        def always_fails(job):
+            if _mutant_index(job) == 3:
+                raise RuntimeError("Broken simulator.")
+            return _passes_on_even_mutants(job)
+
+        workers = [
+            self._start_thread_worker(f"worker_{i}", always_fails) for i in range(2)
+        ]
+        with self.assertRaisesRegex(job_queue.FatalJobError, "Broken simulator"):
+            job_queue.wait_for_results(self.coordinator)
+        self.assertEqual(self.coordinator._attempts[_JOBS[3]], job_queue._MAX_ATTEMPTS)
+        for worker in workers:
+            worker.join(_TIMEOUT_SECONDS)
+            self.assertFalse(worker.is_alive())
+
+    def test_fatal_error_aborts(self):
+        def hash_mismatch(job):
+            if _mutant_index(job) == 5:
+                raise job_queue.FatalJobError("Testbench hash mismatch.")
+            return _passes_on_even_mutants(job)
+
+        worker = self._start_thread_worker("worker", hash_mismatch)
+        with self.assertRaisesRegex(job_queue.FatalJobError, "hash mismatch"):
+            job_queue.wait_for_results(self.coordinator)
+        worker.join(_TIMEOUT_SECONDS)
+        self.assertFalse(worker.is_alive())
+        self.assertEqual(self.coordinator._attempts[_JOBS[5]], 1)
+
+
+if __name__ == "__main__":
+    absltest.main()
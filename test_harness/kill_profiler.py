@@ -0,0 +1,172 @@
+"""Kill-matrix profiling of a testbench against the mutants of a problem.
+
+Testbenches produced by the agent report every mismatching vector when run
+with the +profile plusarg. Any testbench is additionally compiled next to a
+probe module that reports the simulation time at which the run ended, so
+testbenches without the profiling hooks still get a divergence time.
+"""
+
+import csv
+import pathlib
+import re
+from typing import NamedTuple
+
+import constants
+
+PROBE_MODULE_NAME = "profile_probe"
+PROBE_MODULE = f"""\
+`timescale 1ns/1ps
+module {PROBE_MODULE_NAME};
+  final $display("{constants.PROFILE_END_TAG} time=%0t", $time);
+endmodule
+"""
+
+_KILL_PATTERN = re.compile(
+    rf"^{constants.PROFILE_KILL_TAG} vector=(\d+) time=(\d+)", re.MULTILINE
+)
+_VECTORS_PATTERN = re.compile(
+    rf"^{constants.PROFILE_VECTORS_TAG} count=(\d+)", re.MULTILINE
+)
+_END_PATTERN = re.compile(rf"^{constants.PROFILE_END_TAG} time=(\d+)", re.MULTILINE)
+
+
+class MutantProfile(NamedTuple):
+    """Profiling result of one testbench run against one mutant.
+
+    Times are in units of the simulation precision.
+    """
+
+    mutant: str
+    killed: bool
+    # Maps each mismatching vector index to the time of its first mismatch.
+    kill_vectors: dict[int, int]
+    num_vectors: int | None
+    end_time: int | None
+
+    def first_kill(self) -> tuple[int | None, int | None]:
+        """Returns the (vector index, time) at which the mutant was killed.
+
+        The vector index is None for testbenches without profiling hooks, in
+        which case the end of the simulation is taken as the kill time. Both are
+        None if the mutant was not killed.
+        """
+        if not self.killed:
+            return None, None
+        if self.kill_vectors:
+            vector = min(self.kill_vectors)
+            return vector, self.kill_vectors[vector]
+        return None, self.end_time
+
+
+def parse_profile_output(mutant: str, stdout: str, passed: bool) -> MutantProfile:
+    """Extracts the profiling information from the output of a profiled run.
+
+    Args:
+      mutant: Name of the mutant the testbench ran against.
+      stdout: The simulation output.
+      passed: Whether the testbench reported a pass.
+
+    Returns:
+      The profile of the run.
+    """
+    kill_vectors = {}
+    for match in _KILL_PATTERN.finditer(stdout):
+        vector, time = int(match.group(1)), int(match.group(2))
+        kill_vectors.setdefault(vector, time)
+    vectors_match = _VECTORS_PATTERN.search(stdout)
+    end_match = _END_PATTERN.search(stdout)
+    return MutantProfile(
+        mutant=mutant,
+        killed=not passed,
+        kill_vectors=kill_vectors,
+        num_vectors=int(vectors_match.group(1)) if vectors_match else None,
+        end_time=int(end_match.group(1)) if end_match else None,
+    )
+
+
+def _format_ranges(values: list[int]) -> list[str]:
+    """Collapses sorted integers into 'first-last' ranges."""
+    ranges = []
+    start = previous = None
+    for value in values:
+        if previous is not None and value == previous + 1:
+            previous = value
+            continue
+        if start is not None:
+            ranges.append(f"{start}-{previous}" if start != previous else f"{start}")
+        start = previous = value
+    if start is not None:
+        ranges.append(f"{start}-{previous}" if start != previous else f"{start}")
+    return ranges
+
+
+def write_kill_report(
+    output_folder: pathlib.Path, profiles: list[MutantProfile]
+) -> None:
+    """Writes the kill matrix, the kill curve and the dead vectors of a module.
+
+    Files written to `output_folder`:
+      kill_matrix.csv: one row per mutant with its first kill and a 0/1 column
+        for every vector that killed at least one mutant.
+      kill_curve.csv: cumulative number of killed mutants over vectors and time.
+      dead_vectors.txt: ranges of vectors that never killed any mutant.
+
+    Args:
+      output_folder: Folder to write the report to, created if needed.
+      profiles: Profiles of all mutants of the module.
+    """
+    output_folder.mkdir(parents=True, exist_ok=True)
+    killing_vectors = sorted(
+        {vector for profile in profiles for vector in profile.kill_vectors}
+    )
+
+    with open(output_folder / "kill_matrix.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            ["mutant", "killed", "first_kill_vector", "first_kill_time", "end_time"]
+            + [f"v{vector}" for vector in killing_vectors]
+        )
+        for profile in profiles:
+            vector, time = profile.first_kill()
+            writer.writerow(
+                [profile.mutant, int(profile.killed), vector, time, profile.end_time]
+                + [int(v in profile.kill_vectors) for v in killing_vectors]
+            )
+
+    first_kills = sorted(
+        (
+            (time, vector)
+            for vector, time in (profile.first_kill() for profile in profiles)
+            if time is not None
+        ),
+        key=lambda kill: kill[0],
+    )
+    with open(output_folder / "kill_curve.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["first_kill_vector", "first_kill_time", "mutants_killed"])
+        for num_killed, (time, vector) in enumerate(first_kills, start=1):
+            writer.writerow([vector, time, num_killed])
+
+    num_vectors = max(
+        (p.num_vectors for p in profiles if p.num_vectors is not None), default=None
+    )
+    if num_vectors is None:
+        print(
+            "Testbench has no profiling hooks, skipping vector level statistics."
+        )
+        return
+    killing = set(killing_vectors)
+    dead_vectors = [v for v in range(num_vectors) if v not in killing]
+    (output_folder / "dead_vectors.txt").write_text(
+        "\n".join(_format_ranges(dead_vectors)) + "\n"
+    )
+    num_killed = sum(profile.killed for profile in profiles)
+    print(
+        f"{num_killed}/{len(profiles)} mutants killed, "
+        f"{len(dead_vectors)}/{num_vectors} vectors never killed a mutant."
+    )
+    if first_kills:
+        last_time, last_vector = first_kills[-1]
+        print(
+            f"All first kills happen by vector {last_vector} (time {last_time})."
+        )
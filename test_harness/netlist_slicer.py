@@ -0,0 +1,471 @@
+"""Cone-of-influence slicing of flattened gate-level netlists.
+
+The mutants are flat netlists made of declarations, `assign` statements and
+`always_ff` blocks. Slicing builds the driver graph of these statements and
+keeps only the transitive fan-in of the outputs a testbench actually compares,
+so logic that cannot influence a verdict is neither compiled nor simulated.
+
+Anything the slicer does not understand is either kept as is (unknown module
+items) or rejected with a ValueError (whole-file constructs such as several
+modules), in which case the full netlist should be used.
+"""
+
+from collections.abc import Iterable
+import re
+from typing import NamedTuple
+
+_TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<space>\s+)
+    | (?P<comment>//[^\n]*|/\*.*?\*/|\(\*\s.*?\*\))
+    | (?P<string>"(?:\\.|[^"\\])*")
+    | (?P<escaped>\\\S+)
+    | (?P<number>\d*'[sS]?[bBoOdDhH]\s*[0-9a-fA-FxXzZ_?]+|\d+(?:\.\d+)?)
+    | (?P<system>\$[A-Za-z_][\w$]*)
+    | (?P<ident>[A-Za-z_][\w$]*)
+    | (?P<op><=|>=|==|!=|===|!==|&&|\|\||<<|>>|\S)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+_KEYWORDS = frozenset({
+    "always", "always_comb", "always_ff", "always_latch", "and", "assign",
+    "begin", "case", "casex", "casez", "default", "else", "end", "endcase",
+    "endmodule", "final", "for", "if", "initial", "inout", "input", "integer",
+    "localparam", "logic", "module", "negedge", "or", "output", "parameter",
+    "posedge", "reg", "repeat", "signed", "while", "wire",
+})
+_PORT_KEYWORDS = frozenset({"input", "output", "inout"})
+_DECLARATION_KEYWORDS = frozenset({"wire", "reg", "logic", "integer"})
+_PARAMETER_KEYWORDS = frozenset({"parameter", "localparam"})
+_PROCESS_KEYWORDS = frozenset(
+    {"always", "always_comb", "always_ff", "always_latch", "initial", "final"}
+)
+# Constructs that cannot be split into independent module items.
+_UNSUPPORTED_KEYWORDS = frozenset(
+    {"generate", "function", "task", "specify", "fork", "primitive", "interface"}
+)
+# Tokens after which a new statement starts inside a process.
+_STATEMENT_BOUNDARIES = frozenset({";", "begin", "end", "else", ")", ":"})
+
+
+class _Token(NamedTuple):
+    kind: str
+    text: str
+    start: int
+    end: int
+
+
+class _Item(NamedTuple):
+    """A module item with the signals it drives and reads."""
+
+    text: str
+    kind: str
+    defs: frozenset[str]
+    uses: frozenset[str]
+
+
+def _tokenize(source: str) -> list[_Token]:
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(source):
+        kind = match.lastgroup
+        if kind in ("space", "comment"):
+            continue
+        tokens.append(_Token(kind, match.group(), match.start(), match.end()))
+    return tokens
+
+
+def _is_signal(token: _Token) -> bool:
+    return (
+        token.kind == "escaped"
+        or token.kind == "ident"
+        and token.text not in _KEYWORDS
+    )
+
+
+def _signals(tokens: Iterable[_Token]) -> set[str]:
+    return {token.text for token in tokens if _is_signal(token)}
+
+
+def _skip_balanced(tokens: list[_Token], i: int, open_: str, close: str) -> int:
+    """Returns the index after the bracket that closes the one at index i."""
+    depth = 0
+    while i < len(tokens):
+        if tokens[i].text == open_:
+            depth += 1
+        elif tokens[i].text == close:
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    raise ValueError(f"Unbalanced {open_!r} in netlist.")
+
+
+def _skip_until(tokens: list[_Token], i: int, text: str) -> int:
+    """Returns the index after the next token equal to text."""
+    while i < len(tokens):
+        if tokens[i].text == text:
+            return i + 1
+        i += 1
+    raise ValueError(f"Missing {text!r} in netlist.")
+
+
+def _skip_statement(tokens: list[_Token], i: int) -> int:
+    """Returns the index after the procedural statement starting at index i."""
+    text = tokens[i].text
+    if text == "begin":
+        depth = 0
+        while i < len(tokens):
+            if tokens[i].text == "begin":
+                depth += 1
+            elif tokens[i].text == "end":
+                depth -= 1
+                if depth == 0:
+                    return i + 1
+            i += 1
+        raise ValueError("Unbalanced 'begin' in netlist.")
+    if text in ("case", "casex", "casez"):
+        return _skip_until(tokens, i, "endcase")
+    if text == "if":
+        i = _skip_statement(tokens, _skip_balanced(tokens, i + 1, "(", ")"))
+        if i < len(tokens) and tokens[i].text == "else":
+            i = _skip_statement(tokens, i + 1)
+        return i
+    if text in ("for", "while", "repeat"):
+        return _skip_statement(tokens, _skip_balanced(tokens, i + 1, "(", ")"))
+    if text == "@":
+        if tokens[i + 1].text == "*":
+            return _skip_statement(tokens, i + 2)
+        return _skip_statement(tokens, _skip_balanced(tokens, i + 1, "(", ")"))
+    if text == "#":
+        return _skip_statement(tokens, i + 2)
+    return _skip_until(tokens, i, ";")
+
+
+def _assignment_defs(tokens: list[_Token]) -> set[str]:
+    """Returns the signals assigned anywhere in a process body.
+
+    An assignment operator is a '=' or '<=' outside of parentheses; its
+    left-hand side extends back to the previous statement boundary. Signals in
+    index expressions of the left-hand side are reads, not assignments.
+    """
+    defs = set()
+    paren_depth = 0
+    for i, token in enumerate(tokens):
+        if token.text == "(":
+            paren_depth += 1
+        elif token.text == ")":
+            paren_depth -= 1
+        elif token.text in ("=", "<=") and paren_depth == 0:
+            bracket_depth = 0
+            for lhs_token in reversed(tokens[:i]):
+                if lhs_token.text == "]":
+                    bracket_depth += 1
+                elif lhs_token.text == "[":
+                    bracket_depth -= 1
+                elif bracket_depth == 0 and lhs_token.text in _STATEMENT_BOUNDARIES:
+                    break
+                elif bracket_depth == 0 and _is_signal(lhs_token):
+                    defs.add(lhs_token.text)
+    return defs
+
+
+def _continuous_assignment(tokens: list[_Token]) -> tuple[set[str], set[str]]:
+    """Splits 'lhs = rhs' into the signals of the two sides."""
+    equal = next(i for i, token in enumerate(tokens) if token.text == "=")
+    defs = set()
+    uses = _signals(tokens[equal + 1:])
+    bracket_depth = 0
+    for token in tokens[:equal]:
+        if token.text == "[":
+            bracket_depth += 1
+        elif token.text == "]":
+            bracket_depth -= 1
+        elif _is_signal(token):
+            (uses if bracket_depth else defs).add(token.text)
+    return defs, uses
+
+
+def _declared_names(tokens: list[_Token]) -> tuple[set[str], set[str]]:
+    """Returns the names declared by a declaration and the signals it reads."""
+    names = set()
+    uses = set()
+    bracket_depth = 0
+    in_initializer = False
+    for token in tokens[1:]:
+        if token.text == "[":
+            bracket_depth += 1
+        elif token.text == "]":
+            bracket_depth -= 1
+        elif token.text == "=" and bracket_depth == 0:
+            in_initializer = True
+        elif token.text == "," and bracket_depth == 0:
+            in_initializer = False
+        elif _is_signal(token):
+            if bracket_depth or in_initializer:
+                uses.add(token.text)
+            else:
+                names.add(token.text)
+    return names, uses
+
+
+def _header_ports(tokens: list[_Token]) -> dict[str, str]:
+    """Returns the ports declared in an ANSI-style module header.
+
+    Args:
+      tokens: The header tokens, from 'module' to the closing ';'.
+
+    Returns:
+      Maps the port names to their direction. Empty for a non-ANSI header,
+      whose port list only holds names.
+    """
+    i = 2
+    if tokens[i].text == "#":
+        i = _skip_balanced(tokens, i + 1, "(", ")")
+    if tokens[i].text != "(":
+        return {}
+    end = _skip_balanced(tokens, i, "(", ")") - 1
+    ports = {}
+    direction = None
+    segment = []
+    for token in tokens[i + 1 : end] + [_Token("op", ",", 0, 0)]:
+        if token.text != ",":
+            segment.append(token)
+            continue
+        if segment and segment[0].text in _PORT_KEYWORDS:
+            direction = segment[0].text
+        if direction is not None:
+            # The name is the last identifier outside of the ranges, after the
+            # direction, net type, signedness and packed dimensions.
+            bracket_depth = 0
+            name = None
+            for segment_token in segment:
+                if segment_token.text == "[":
+                    bracket_depth += 1
+                elif segment_token.text == "]":
+                    bracket_depth -= 1
+                elif bracket_depth == 0 and _is_signal(segment_token):
+                    name = segment_token.text
+            if name is None:
+                raise ValueError("Cannot parse the module port list.")
+            ports[name] = direction
+        segment = []
+    return ports
+
+
+def _parse_items(source: str) -> tuple[str, str, list[_Item], dict[str, str]]:
+    """Splits a single-module netlist into its header, footer and items.
+
+    Returns:
+      The header, the footer, the module items and the ports declared in the
+      header with their direction.
+    """
+    tokens = _tokenize(source)
+    keywords = [token.text for token in tokens if token.kind == "ident"]
+    if keywords.count("module") != 1:
+        raise ValueError("Netlist slicing needs exactly one module per file.")
+    unsupported = _UNSUPPORTED_KEYWORDS.intersection(keywords)
+    if unsupported:
+        raise ValueError(f"Unsupported netlist constructs: {sorted(unsupported)}")
+
+    i = next(i for i, token in enumerate(tokens) if token.text == "module")
+    header_end = _skip_until(tokens, i, ";")
+    header = source[: tokens[header_end - 1].end]
+    header_ports = _header_ports(tokens[i:header_end])
+    endmodule = max(i for i, token in enumerate(tokens) if token.text == "endmodule")
+    footer = source[tokens[endmodule].start :]
+
+    items = []
+    i = header_end
+    while i < endmodule:
+        first = tokens[i].text
+        start = i
+        if first in _PROCESS_KEYWORDS:
+            i = _skip_statement(tokens, i + 1)
+            body = tokens[start:i]
+            defs = _assignment_defs(body)
+            item = _Item("", "process", frozenset(defs), frozenset(_signals(body) - defs))
+        else:
+            i = _skip_until(tokens, i, ";")
+            statement = tokens[start:i]
+            if first == "assign":
+                defs, uses = _continuous_assignment(statement)
+                item = _Item("", "assign", frozenset(defs), frozenset(uses))
+            elif first in _PORT_KEYWORDS:
+                names, uses = _declared_names(statement)
+                item = _Item("", "port", frozenset(names), frozenset(uses))
+            elif first in _DECLARATION_KEYWORDS:
+                names, uses = _declared_names(statement)
+                item = _Item("", "declaration", frozenset(names), frozenset(uses))
+            elif first in _PARAMETER_KEYWORDS:
+                item = _Item("", "parameter", frozenset(), frozenset())
+            else:
+                # E.g. cell instances: keep them and everything they touch.
+                item = _Item("", "other", frozenset(), frozenset(_signals(statement)))
+        text = source[tokens[start].start : tokens[i - 1].end]
+        items.append(item._replace(text=text))
+    return header, footer, items, header_ports
+
+
+def module_outputs(source: str) -> tuple[str, list[str]]:
+    """Returns the module name and output port names of a netlist.
+
+    Raises:
+      ValueError: If the netlist uses constructs the slicer cannot split or has
+        no output port.
+    """
+    header, _, items, header_ports = _parse_items(source)
+    module_name = next(
+        token.text
+        for token, previous in zip(_tokenize(header)[1:], _tokenize(header))
+        if previous.text == "module"
+    )
+    outputs = [name for name, direction in header_ports.items() if direction == "output"]
+    for item in items:
+        if item.kind == "port" and item.text.startswith("output"):
+            outputs.extend(sorted(item.defs))
+    if not outputs:
+        raise ValueError(f"No output ports found in module {module_name}.")
+    return module_name, outputs
+
+
+def slice_netlist(source: str, outputs: Iterable[str]) -> str:
+    """Keeps only the logic in the transitive fan-in of the given outputs.
+
+    Port declarations, parameters and unknown items are always kept. A
+    declaration is kept if it declares a signal of the cone.
+
+    Args:
+      source: The netlist, a single flat module.
+      outputs: Names of the outputs whose fan-in is kept.
+
+    Returns:
+      The reduced netlist.
+
+    Raises:
+      ValueError: If the netlist uses constructs the slicer cannot split.
+    """
+    header, footer, items, header_ports = _parse_items(source)
+    drivers = {}
+    for index, item in enumerate(items):
+        if item.kind in ("assign", "process", "declaration"):
+            for signal in item.defs:
+                drivers.setdefault(signal, []).append(index)
+
+    kept = {
+        index
+        for index, item in enumerate(items)
+        if item.kind in ("port", "parameter", "other")
+    }
+    worklist = list(outputs)
+    for index in kept:
+        worklist.extend(items[index].uses)
+    cone = set()
+    while worklist:
+        signal = worklist.pop()
+        if signal in cone:
+            continue
+        cone.add(signal)
+        for index in drivers.get(signal, []):
+            if index not in kept:
+                kept.add(index)
+                worklist.extend(items[index].uses)
+                # Statements driving several signals pull all of them in.
+                worklist.extend(items[index].defs)
+
+    ports = set(header_ports)
+    for item in items:
+        if item.kind == "port":
+            ports |= item.defs
+    for index, item in enumerate(items):
+        if item.kind == "declaration" and item.defs & (cone | ports):
+            kept.add(index)
+    lines = [header]
+    lines.extend(f"  {item.text}" for index, item in enumerate(items) if index in kept)
+    lines.append(footer)
+    return "\n".join(lines)
+
+
+def _read_outputs(
+    tokens: list[_Token], j: int, end: int, outside: list[_Token], outputs: list[str]
+) -> list[str]:
+    """Returns the outputs of the instance named at index j that outside reads.
+
+    The port connections of the instance end at index end.
+    """
+    connections = {}
+    k = j + 2
+    while k < end - 1:
+        if tokens[k].text == "." and tokens[k + 2].text == "(":
+            close = _skip_balanced(tokens, k + 2, "(", ")")
+            if tokens[k + 1].text in outputs:
+                connections[tokens[k + 1].text] = _signals(tokens[k + 3 : close - 1])
+            k = close
+        elif tokens[k].text == ",":
+            k += 1
+        else:
+            # Positional connections cannot be matched to port names.
+            return list(outputs)
+    read = set()
+    k = 0
+    while k < len(outside):
+        if outside[k].text in _DECLARATION_KEYWORDS:
+            # Declaring a wire does not read it.
+            declaration_end = _skip_until(outside, k, ";")
+            read |= _declared_names(outside[k:declaration_end])[1]
+            k = declaration_end
+        else:
+            if _is_signal(outside[k]):
+                read.add(outside[k].text)
+            k += 1
+    return [
+        output for output in outputs if output not in connections or connections[output] & read
+    ]
+
+
+def compared_outputs(tb_source: str, module_name: str, outputs: list[str]) -> list[str]:
+    """Returns the outputs of a module that a testbench reads.
+
+    An output counts as read if a signal of its port connection appears in the
+    testbench outside of the instantiation and of declarations. Outputs read
+    from any instance of the module count. Positional or missing
+    instantiations conservatively make all outputs count as read.
+
+    Args:
+      tb_source: The testbench source.
+      module_name: Name of the instantiated module.
+      outputs: All output ports of the module.
+
+    Returns:
+      The outputs the testbench reads.
+
+    Raises:
+      ValueError: If the testbench references signals inside an instance,
+        which slicing could remove, or reads none of the outputs.
+    """
+    tokens = _tokenize(tb_source)
+    read_outputs = None
+    for i, token in enumerate(tokens[:-2]):
+        if token.text != module_name:
+            continue
+        j = i + 1
+        if tokens[j].text == "#":
+            j = _skip_balanced(tokens, j + 1, "(", ")")
+        if not _is_signal(tokens[j]) or tokens[j + 1].text != "(":
+            continue
+        instance_name = tokens[j].text
+        end = _skip_balanced(tokens, j + 1, "(", ")")
+        outside = tokens[:i] + tokens[end:]
+        for k, outside_token in enumerate(outside[:-1]):
+            if outside_token.text == instance_name and outside[k + 1].text == ".":
+                raise ValueError(
+                    f"Testbench references signals inside instance {instance_name}."
+                )
+        read_outputs = (read_outputs or set()) | set(
+            _read_outputs(tokens, j, end, outside, outputs)
+        )
+    if read_outputs is None:
+        return list(outputs)
+    compared = [output for output in outputs if output in read_outputs]
+    if not compared:
+        raise ValueError(f"Testbench reads no output of {module_name}.")
+    return compared
@@ -0,0 +1,86 @@
+"""Tests for netlist_slicer.
+
+Run from the test_harness folder:
+python netlist_slicer_test.py
+"""
+
+import pathlib
+
+from absl.testing import absltest
+
+import netlist_slicer
+
+_VISIBLE_PROBLEMS = pathlib.Path(__file__).parent.parent / "visible_problems"
+
+_ANSI_NETLIST = """\
+module foo #(parameter W = 4) (input clk, input [W-1:0] a, b, output reg [3:0] y, output wire z);
+  wire t;
+  assign t = a & b;
+  always_ff @(posedge clk) y <= t;
+  assign z = t[0];
+endmodule
+"""
+
+
+def _token_texts(source: str) -> list[str]:
+    return [token.text for token in netlist_slicer._tokenize(source)]
+
+
+class NetlistSlicerTest(absltest.TestCase):
+
+    def test_module_outputs_of_ansi_header(self):
+        self.assertEqual(
+            netlist_slicer.module_outputs(_ANSI_NETLIST), ("foo", ["y", "z"])
+        )
+
+    def test_module_outputs_of_non_ansi_header(self):
+        netlist = "module foo(a, y);\n  input a;\n  output y;\n  assign y = a;\nendmodule\n"
+        self.assertEqual(netlist_slicer.module_outputs(netlist), ("foo", ["y"]))
+
+    def test_module_outputs_without_outputs_raises(self):
+        with self.assertRaises(ValueError):
+            netlist_slicer.module_outputs("module foo(input a);\nendmodule\n")
+
+    def test_compared_outputs_of_every_instance(self):
+        tb = (
+            "module tb;\n  wire y1, z1, y2, z2;\n"
+            "  m ref_i(.y(y1), .z(z1));\n  m dut_i(.y(y2), .z(z2));\n"
+            "  initial if (y2 !== 1'b0) $display(\"mismatch\");\nendmodule\n"
+        )
+        self.assertEqual(netlist_slicer.compared_outputs(tb, "m", ["y", "z"]), ["y"])
+        tb = tb.replace("y2 !==", "z1 !==")
+        self.assertEqual(netlist_slicer.compared_outputs(tb, "m", ["y", "z"]), ["z"])
+
+    def test_compared_outputs_without_reads_raises(self):
+        tb = "module tb;\n  wire y1;\n  m dut_i(.y(y1));\nendmodule\n"
+        with self.assertRaises(ValueError):
+            netlist_slicer.compared_outputs(tb, "m", ["y"])
+
+    def test_slice_keeps_only_the_cone(self):
+        sliced = netlist_slicer.slice_netlist(_ANSI_NETLIST, ["z"])
+        self.assertIn("assign z = t[0];", sliced)
+        self.assertIn("assign t = a & b;", sliced)
+        self.assertNotIn("always_ff", sliced)
+
+    def test_slice_on_all_outputs_reproduces_ansi_netlist(self):
+        _, outputs = netlist_slicer.module_outputs(_ANSI_NETLIST)
+        sliced = netlist_slicer.slice_netlist(_ANSI_NETLIST, outputs)
+        self.assertEqual(_token_texts(sliced), _token_texts(_ANSI_NETLIST))
+
+    def test_slice_on_all_outputs_reproduces_visible_netlists(self):
+        netlists = sorted(_VISIBLE_PROBLEMS.glob("*/mutant_*.v"))
+        if not netlists:
+            self.skipTest("No visible problems to check.")
+        for netlist_file in netlists:
+            with self.subTest(netlist=str(netlist_file)):
+                netlist = netlist_file.read_text()
+                try:
+                    _, outputs = netlist_slicer.module_outputs(netlist)
+                except ValueError:
+                    continue
+                sliced = netlist_slicer.slice_netlist(netlist, outputs)
+                self.assertEqual(_token_texts(sliced), _token_texts(netlist))
+
+
+if __name__ == "__main__":
+    absltest.main()
@@ -9,12 +9,49 @@ Run for hidden problems:
 python test_harness/run_evaluation.py \
   --problems_folder="${PWD}/hidden_problems" \
   --answers_folder="${PWD}/hidden_problems_answers"
+
+Distribute the simulations over several workers. The coordinator hands out
+(module, mutant, tb hash) jobs and computes the precision:
+python test_harness/run_evaluation.py --mode=coordinator \
+  --num_local_workers=8 \
+  --problems_folder="${PWD}/hidden_problems" \
+  --answers_folder="${PWD}/hidden_problems_answers"
+
+The coordinator listens on localhost by default. Anyone who can reach the
+queue and knows its key can run code on the coordinator, so only bind it to
+an interface of a trusted network. Workers may then run on other hosts as
+long as they see the same problems folder and get the key the coordinator
+prints at startup (or the one passed to it with --queue_authkey):
+python test_harness/run_evaluation.py --mode=coordinator \
+  --queue_address="<coordinator host>:50051" \
+  --problems_folder="${PWD}/hidden_problems" \
+  --answers_folder="${PWD}/hidden_problems_answers"
+
+python test_harness/run_evaluation.py --mode=worker \
+  --queue_address="<coordinator host>:50051" \
+  --queue_authkey="<key printed by the coordinator>" \
+  --problems_folder="${PWD}/hidden_problems"
+
+Simulate only the logic feeding the outputs tb.v compares, checking the
+verdicts against full-netlist runs:
+python test_harness/run_evaluation.py \
+  --problems_folder="${PWD}/visible_problems" \
+  --slice_netlists --verify_slices
+
+Profile which vectors of tb.v kill which mutants:
+python test_harness/run_evaluation.py \
+  --problems_folder="${PWD}/visible_problems" \
+  --profile_output_folder="${PWD}/profiles"
 """
 
 from collections.abc import Sequence
+from concurrent import futures
 import os
 import pathlib
+import secrets
+import socket
 import subprocess
+import sys
 import tempfile
 import math
 
@@ -22,6 +59,11 @@ from absl import app
 from absl import flags
 
 import constants
+import job_queue
+import kill_profiler
+import netlist_slicer
+import sharding
+import tracing
 
 
 _PROBLEMS_FOLDER = flags.DEFINE_string(
@@ -40,7 +82,64 @@ _INCLUDE_PATHS = flags.DEFINE_list(
     None,
     "List of include paths to be used when compiling the testbench.",
 )
+_MODE = flags.DEFINE_enum(
+    "mode",
+    "local",
+    ["local", "coordinator", "worker"],
+    "Run all simulations in this process, coordinate a pool of workers, or "
+    "act as a worker for a coordinator.",
+)
+_QUEUE_ADDRESS = flags.DEFINE_string(
+    "queue_address",
+    "localhost:50051",
+    "host:port the coordinator listens on and the workers connect to.",
+)
+_QUEUE_AUTHKEY = flags.DEFINE_string(
+    "queue_authkey",
+    None,
+    "Key shared between the coordinator and the workers. Required by workers; "
+    "the coordinator generates a random one if not set.",
+)
+_NUM_LOCAL_WORKERS = flags.DEFINE_integer(
+    "num_local_workers",
+    0,
+    "Number of worker processes the coordinator starts on the local host.",
+)
+_HEARTBEAT_TIMEOUT_SECONDS = flags.DEFINE_float(
+    "heartbeat_timeout_seconds",
+    30.0,
+    "Time without heartbeat after which a job is handed to another worker.",
+)
+_PROFILE_OUTPUT_FOLDER = flags.DEFINE_string(
+    "profile_output_folder",
+    None,
+    "If set, profile tb.v against every mutant and write a kill matrix, kill "
+    "curve and the vectors that never killed a mutant per module to this folder.",
+)
+_TRACE_FILE = flags.DEFINE_string(
+    "trace_file",
+    None,
+    "If set, write a Chrome trace of the compile and simulation steps to this "
+    "file. Traces of local workers are merged into the coordinator's one.",
+)
+_NUM_SHARDS = flags.DEFINE_integer(
+    "num_shards",
+    1,
+    "Number of parallel simulations the stimulus blocks of tb.v are split into.",
+)
+_SLICE_NETLISTS = flags.DEFINE_bool(
+    "slice_netlists",
+    False,
+    "Compile only the cone of influence of the mutant outputs tb.v compares.",
+)
+_VERIFY_SLICES = flags.DEFINE_bool(
+    "verify_slices",
+    False,
+    "With --slice_netlists, also run the full netlists and report (and use the "
+    "full verdict for) any mutant whose verdict changed.",
+)
 _TIMEOUT_SECONDS = 10
+_HEARTBEAT_INTERVAL_SECONDS = 2.0
 
 
 def compute_problem_weight(mutant_file: pathlib.Path) -> float:
@@ -104,8 +203,152 @@ def get_answer_mutant_id(answers_folder: pathlib.Path, module_name: str) -> int:
         raise ValueError(f"Invalid content in answer file {answer_file}: {e}")
 
 
+def _compile_testbench(
+    compiled_file: str,
+    tb_module_name: str,
+    dependency_paths: list[str],
+    include_folders: list[str] | None,
+    extra_top_modules: Sequence[str] = (),
+) -> bool:
+    """Compiles a testbench with iverilog, returns False on timeout."""
+    include_args = []
+    if include_folders is not None:
+        for include_folder in include_folders:
+            include_args.append("-I")
+            include_args.append(include_folder)
+    top_args = ["-s", tb_module_name]
+    for top_module in extra_top_modules:
+        top_args += ["-s", top_module]
+    iverilog_cmd = (
+        [
+            "iverilog",
+            "-g2012",
+            "-o",
+            compiled_file,
+        ]
+        + top_args
+        + dependency_paths
+        + include_args
+    )
+    try:
+        tracing.run_subprocess(iverilog_cmd, check=True, timeout=_TIMEOUT_SECONDS)
+    except subprocess.TimeoutExpired:
+        print(f"Compilation timed out after {_TIMEOUT_SECONDS} seconds")
+        return False
+    return True
+
+
+def _run_simulation(
+    compiled_file: str,
+    plusargs: Sequence[str] = (),
+    queued_at: float | None = None,
+) -> str | None:
+    """Runs a compiled testbench with vvp, returns its stdout or None on timeout."""
+    vvp_cmd = [
+        "vvp",
+        compiled_file,
+    ] + list(plusargs)
+    try:
+        vvp_out = tracing.run_subprocess(
+            vvp_cmd,
+            queued_at=queued_at,
+            check=True,
+            capture_output=True,
+            timeout=_TIMEOUT_SECONDS,
+        )
+        if vvp_out.returncode != 0:
+            raise RuntimeError(
+                f"VVP failed with return code {vvp_out.returncode}. "
+                "Check the output for details."
+            )
+        return vvp_out.stdout.decode()
+    except subprocess.TimeoutExpired:
+        print(f"Execution timed out after {_TIMEOUT_SECONDS} seconds")
+    return None
+
+
+def run_testbench(
+    tb_module_name: str,
+    dependency_paths: list[str],
+    include_folders: list[str] | None,
+    extra_top_modules: Sequence[str] = (),
+    plusargs: Sequence[str] = (),
+) -> str | None:
+    """Compiles and runs a testbench with iverilog and returns its output.
+
+    Args:
+      tb_module_name: The name of the testbench module to run.
+      dependency_paths: List of paths to the Verilog files that the testbench depends on.
+      include_folders: List of folders to include during compilation.
+      extra_top_modules: Additional root modules to elaborate next to the testbench.
+      plusargs: Plusargs passed to the simulation, e.g. '+profile'.
+
+    Returns:
+      The simulation stdout, or None if the compilation or simulation timed out.
+
+    Raises:
+      RuntimeError: If the VVP command fails.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        compiled_file = os.path.join(temp_dir, "out")
+        if not _compile_testbench(
+            compiled_file,
+            tb_module_name,
+            dependency_paths,
+            include_folders,
+            extra_top_modules,
+        ):
+            return None
+        return _run_simulation(compiled_file, plusargs)
+
+
+def run_testbench_shards(
+    tb_module_name: str,
+    dependency_paths: list[str],
+    include_folders: list[str] | None,
+    num_shards: int,
+) -> list[str | None]:
+    """Compiles a testbench once and runs its stimulus shards in parallel.
+
+    Shard k runs with +shard/+num_shards plusargs selecting its part of the
+    stimulus, testbenches that ignore these plusargs just run `num_shards` times.
+
+    Args:
+      tb_module_name: The name of the testbench module to run.
+      dependency_paths: List of paths to the Verilog files that the testbench depends on.
+      include_folders: List of folders to include during compilation.
+      num_shards: Number of simulations to run.
+
+    Returns:
+      The stdout of each shard, None for shards that timed out. All entries are
+      None if the compilation timed out.
+
+    Raises:
+      RuntimeError: If a VVP command fails.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        compiled_file = os.path.join(temp_dir, "out")
+        if not _compile_testbench(
+            compiled_file, tb_module_name, dependency_paths, include_folders
+        ):
+            return [None] * num_shards
+        queued_at = tracing.now()
+        with futures.ThreadPoolExecutor(max_workers=num_shards) as executor:
+            return list(
+                executor.map(
+                    lambda shard: _run_simulation(
+                        compiled_file, sharding.shard_plusargs(shard, num_shards), queued_at
+                    ),
+                    range(num_shards),
+                )
+            )
+
+
 def is_test_passing(
-    tb_module_name: str, dependency_paths: list[str], include_folders: list[str] | None
+    tb_module_name: str,
+    dependency_paths: list[str],
+    include_folders: list[str] | None,
+    num_shards: int = 1,
 ) -> bool:
     """Runs iverilog and returns whether the test passed.
 
@@ -113,6 +356,8 @@ def is_test_passing(
       tb_module_name: The name of the testbench module to run.
       dependency_paths: List of paths to the Verilog files that the testbench depends on.
       include_folders: List of folders to include during compilation.
+      num_shards: Number of stimulus shards to simulate in parallel. The test
+        only passes if every shard passes.
 
     Returns:
       True if the test passed, False if it doesn't pass or the timeout occurs.
@@ -120,56 +365,309 @@ def is_test_passing(
     Raises:
       RuntimeError: If the VVP command fails.
     """
+    shard_outputs = run_testbench_shards(
+        tb_module_name, dependency_paths, include_folders, num_shards
+    )
+    # Check if the test passed by looking for the pass string in stdout.
+    return all(
+        stdout is not None and constants.TEST_PASS_STRING in stdout
+        for stdout in shard_outputs
+    )
+
+
+def slice_mutant(
+    tb_file: pathlib.Path, mutant_file: pathlib.Path, output_folder: pathlib.Path
+) -> pathlib.Path | None:
+    """Writes the cone of influence of the mutant outputs compared by tb.v.
+
+    Args:
+      tb_file: Path to the testbench.
+      mutant_file: Path to the mutant netlist.
+      output_folder: Folder to write the reduced netlist to.
+
+    Returns:
+      Path to the reduced netlist, or None if the netlist cannot be sliced.
+    """
+    netlist = mutant_file.read_text()
+    try:
+        module_name, outputs = netlist_slicer.module_outputs(netlist)
+        compared = netlist_slicer.compared_outputs(
+            tb_file.read_text(), module_name, outputs
+        )
+        sliced = netlist_slicer.slice_netlist(netlist, compared)
+    except ValueError as e:
+        print(f"Not slicing {mutant_file}: {e}")
+        return None
+    sliced_file = output_folder / mutant_file.name
+    sliced_file.write_text(sliced)
+    return sliced_file
+
+
+def evaluate_mutant(
+    tb_file: pathlib.Path,
+    mutant_file: pathlib.Path,
+    include_folders: list[str] | None,
+    num_shards: int = 1,
+) -> bool:
+    """Runs a testbench against a mutant, on its sliced netlist if enabled.
+
+    Args:
+      tb_file: Path to the testbench.
+      mutant_file: Path to the mutant netlist.
+      include_folders: List of folders to include during compilation.
+      num_shards: Number of stimulus shards to simulate in parallel.
+
+    Returns:
+      True if the test passed.
+    """
+    dependencies = [str(tb_file), str(mutant_file)]
+    if not _SLICE_NETLISTS.value:
+        return is_test_passing(
+            constants.TESTBENCH_MODULE_NAME, dependencies, include_folders, num_shards
+        )
     with tempfile.TemporaryDirectory() as temp_dir:
-        compiled_file = os.path.join(temp_dir, "out")
-        include_args = []
-        if include_folders is not None:
-            for include_folder in include_folders:
-                include_args.append("-I")
-                include_args.append(include_folder)
-        iverilog_cmd = (
-            [
-                "iverilog",
-                "-g2012",
-                "-o",
-                compiled_file,
-                "-s",
-                tb_module_name,
-            ]
-            + dependency_paths
-            + include_args
+        with tracing.span("slice", mutant=mutant_file.name):
+            sliced_file = slice_mutant(tb_file, mutant_file, pathlib.Path(temp_dir))
+        if sliced_file is None:
+            return is_test_passing(
+                constants.TESTBENCH_MODULE_NAME,
+                dependencies,
+                include_folders,
+                num_shards,
+            )
+        passed = is_test_passing(
+            constants.TESTBENCH_MODULE_NAME,
+            [str(tb_file), str(sliced_file)],
+            include_folders,
+            num_shards,
         )
-        try:
-            subprocess.run(iverilog_cmd, check=True, timeout=_TIMEOUT_SECONDS)
-        except subprocess.TimeoutExpired:
-            print(f"Compilation timed out after {_TIMEOUT_SECONDS} seconds")
-            return False
-        vvp_cmd = [
-            "vvp",
-            compiled_file,
-        ]
-        try:
-            vvp_out = subprocess.run(
-                vvp_cmd, check=True, capture_output=True, timeout=_TIMEOUT_SECONDS
+    if _VERIFY_SLICES.value:
+        full_passed = is_test_passing(
+            constants.TESTBENCH_MODULE_NAME, dependencies, include_folders, num_shards
+        )
+        if full_passed != passed:
+            print(
+                f"Slicing changed the verdict of {mutant_file}: "
+                f"sliced={passed}, full={full_passed}"
             )
-            if vvp_out.returncode != 0:
-                raise RuntimeError(
-                    f"VVP failed with return code {vvp_out.returncode}. "
-                    "Check the output for details."
+            return full_passed
+    return passed
+
+
+def evaluate_job(
+    problems_folder: pathlib.Path,
+    job: job_queue.Job,
+    include_folders: list[str] | None,
+    num_shards: int = 1,
+) -> bool:
+    """Runs the testbench of a job against its mutant.
+
+    Args:
+      problems_folder: Path to this host's view of the problems folder.
+      job: The job to run.
+      include_folders: List of folders to include during compilation.
+      num_shards: Number of stimulus shards to simulate in parallel.
+
+    Returns:
+      True if the test passed.
+
+    Raises:
+      job_queue.FatalJobError: If the local testbench differs from the
+        coordinator's one.
+    """
+    problem_dir = problems_folder / job.module
+    tb_file = problem_dir / constants.TESTBENCH_FILE_NAME
+    if job_queue.compute_file_hash(tb_file) != job.tb_hash:
+        raise job_queue.FatalJobError(
+            f"Testbench {tb_file} does not match the one of the coordinator."
+        )
+    return evaluate_mutant(
+        tb_file, problem_dir / job.mutant_file_name, include_folders, num_shards
+    )
+
+
+def evaluate_locally(
+    module_to_mutant_files: dict[str, list[pathlib.Path]],
+) -> dict[str, list[int]]:
+    """Runs every mutant of every module in this process.
+
+    Args:
+      module_to_mutant_files: Dictionary mapping module names to their sorted
+        mutant files.
+
+    Returns:
+      Dictionary mapping module names to one guess (1 if the test passed) per
+      mutant file.
+    """
+    module_to_guesses = {}
+    for module, mutant_files in module_to_mutant_files.items():
+        tb_file = mutant_files[0].parent / constants.TESTBENCH_FILE_NAME
+        guesses = []
+        for mutant_file in mutant_files:
+            with tracing.span("evaluate", module=module, mutant=mutant_file.name):
+                passed = evaluate_mutant(
+                    tb_file, mutant_file, _INCLUDE_PATHS.value, _NUM_SHARDS.value
                 )
-            stdout = vvp_out.stdout.decode()
-            # Check if the test passed by looking for the pass string in stdout.
-            if constants.TEST_PASS_STRING in stdout:
-                return True
-        except subprocess.TimeoutExpired:
-            print(f"Execution timed out after {_TIMEOUT_SECONDS} seconds")
-        return False
+            guesses.append(1 if passed else 0)
+        module_to_guesses[module] = guesses
+    return module_to_guesses
 
 
-def main(argv: Sequence[str]) -> None:
-    if len(argv) > 1:
-        raise app.UsageError("Too many command-line arguments.")
-    problems_folder = pathlib.Path(_PROBLEMS_FOLDER.value)
+def evaluate_with_profile(
+    module_to_mutant_files: dict[str, list[pathlib.Path]],
+    output_folder: pathlib.Path,
+) -> dict[str, list[int]]:
+    """Runs every mutant with profiling enabled and writes a kill report per module.
+
+    Args:
+      module_to_mutant_files: Dictionary mapping module names to their sorted
+        mutant files.
+      output_folder: Folder receiving one report subfolder per module.
+
+    Returns:
+      Dictionary mapping module names to one guess (1 if the test passed) per
+      mutant file.
+    """
+    module_to_guesses = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        probe_file = pathlib.Path(temp_dir) / f"{kill_profiler.PROBE_MODULE_NAME}.v"
+        probe_file.write_text(kill_profiler.PROBE_MODULE)
+        for module, mutant_files in module_to_mutant_files.items():
+            print(f"\nProfiling module: {module}")
+            tb_file = mutant_files[0].parent / constants.TESTBENCH_FILE_NAME
+            profiles = []
+            guesses = []
+            for mutant_file in mutant_files:
+                dependencies = [str(tb_file), str(mutant_file), str(probe_file)]
+                with tracing.span("profile", module=module, mutant=mutant_file.name):
+                    stdout = run_testbench(
+                        constants.TESTBENCH_MODULE_NAME,
+                        dependencies,
+                        _INCLUDE_PATHS.value,
+                        extra_top_modules=[kill_profiler.PROBE_MODULE_NAME],
+                        plusargs=[f"+{constants.PROFILE_PLUSARG}"],
+                    )
+                passed = stdout is not None and constants.TEST_PASS_STRING in stdout
+                profiles.append(
+                    kill_profiler.parse_profile_output(
+                        mutant_file.stem, stdout or "", passed
+                    )
+                )
+                guesses.append(1 if passed else 0)
+            kill_profiler.write_kill_report(output_folder / module, profiles)
+            module_to_guesses[module] = guesses
+    return module_to_guesses
+
+
+def evaluate_distributed(
+    problems_folder: pathlib.Path,
+    module_to_mutant_files: dict[str, list[pathlib.Path]],
+) -> dict[str, list[int]]:
+    """Hands every mutant of every module to the workers and collects results.
+
+    Args:
+      problems_folder: Path to the problems folder.
+      module_to_mutant_files: Dictionary mapping module names to their sorted
+        mutant files.
+
+    Returns:
+      Dictionary mapping module names to one guess (1 if the test passed) per
+      mutant file.
+
+    Raises:
+      job_queue.FatalJobError: If a worker hit a setup error, e.g. a problems
+        folder out of sync with the coordinator's one.
+    """
+    jobs = []
+    for module, mutant_files in module_to_mutant_files.items():
+        tb_file = problems_folder / module / constants.TESTBENCH_FILE_NAME
+        tb_hash = job_queue.compute_file_hash(tb_file)
+        for mutant_file in mutant_files:
+            jobs.append(job_queue.Job(module, mutant_file.name, tb_hash))
+
+    host, port = job_queue.parse_address(_QUEUE_ADDRESS.value)
+    authkey = _QUEUE_AUTHKEY.value
+    if authkey is None:
+        authkey = secrets.token_hex(16)
+        print(f"Workers must be started with --queue_authkey={authkey}")
+    coordinator = job_queue.JobCoordinator(jobs, _HEARTBEAT_TIMEOUT_SECONDS.value)
+    job_queue.serve(coordinator, (host, port), authkey.encode())
+    print(f"Serving {len(jobs)} jobs on {host}:{port}")
+
+    local_workers = []
+    for worker_index in range(_NUM_LOCAL_WORKERS.value):
+        worker_cmd = [
+            sys.executable,
+            os.path.abspath(__file__),
+            "--mode=worker",
+            f"--problems_folder={problems_folder}",
+            f"--queue_address=localhost:{port}",
+            f"--queue_authkey={authkey}",
+            f"--num_shards={_NUM_SHARDS.value}",
+            f"--slice_netlists={_SLICE_NETLISTS.value}",
+            f"--verify_slices={_VERIFY_SLICES.value}",
+        ]
+        if _INCLUDE_PATHS.value:
+            worker_cmd.append(f"--include_paths={','.join(_INCLUDE_PATHS.value)}")
+        if _TRACE_FILE.value:
+            worker_cmd.append(f"--trace_file={_local_worker_trace_file(worker_index)}")
+        local_workers.append(subprocess.Popen(worker_cmd))
+
+    try:
+        results = job_queue.wait_for_results(
+            coordinator,
+            on_progress=lambda done: print(f"Finished {done}/{len(jobs)} jobs"),
+        )
+    except job_queue.FatalJobError:
+        for worker in local_workers:
+            worker.terminate()
+        raise
+    for worker in local_workers:
+        worker.wait()
+
+    module_to_guesses = {module: [] for module in module_to_mutant_files}
+    for job in jobs:
+        module_to_guesses[job.module].append(1 if results[job] else 0)
+    return module_to_guesses
+
+
+def _local_worker_trace_file(worker_index: int) -> str:
+    """Returns the trace file of a worker started by the coordinator."""
+    return f"{_TRACE_FILE.value}.worker{worker_index}"
+
+
+def run_worker(problems_folder: pathlib.Path) -> None:
+    """Runs jobs handed out by the coordinator until all of them are done.
+
+    Args:
+      problems_folder: Path to this host's view of the problems folder.
+    """
+    if _QUEUE_AUTHKEY.value is None:
+        raise app.UsageError("Workers need the --queue_authkey of the coordinator.")
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    print(f"Worker {worker_id} connecting to {_QUEUE_ADDRESS.value}")
+    job_queue.run_worker(
+        job_queue.parse_address(_QUEUE_ADDRESS.value),
+        _QUEUE_AUTHKEY.value.encode(),
+        worker_id,
+        lambda job: evaluate_job(
+            problems_folder, job, _INCLUDE_PATHS.value, _NUM_SHARDS.value
+        ),
+        _HEARTBEAT_INTERVAL_SECONDS,
+    )
+
+
+def evaluate(problems_folder: pathlib.Path) -> None:
+    """Evaluates the testbenches of all problems and prints their precision.
+
+    Args:
+      problems_folder: Path to the problems folder.
+    """
+    if _MODE.value == "worker":
+        run_worker(problems_folder)
+        return
+    if _PROFILE_OUTPUT_FOLDER.value is not None and _MODE.value != "local":
+        raise app.UsageError("Profiling is only supported in local mode.")
     is_dry_run = _ANSWERS_FOLDER.value is None
     if is_dry_run:
         print("Running in dry run mode, the answer folder is not provided.")
@@ -196,6 +694,8 @@ def main(argv: Sequence[str]) -> None:
 
     module_to_precision = {}
     module_to_weight = {}
+    module_to_answer_mutant_id = {}
+    module_to_mutant_files = {}
     for module in module_names:
         print(f"\nEvaluating module: {module}")
         problem_dir = problems_folder / module
@@ -203,6 +703,7 @@ def main(argv: Sequence[str]) -> None:
             answer_mutant_id = 0
         else:
             answer_mutant_id = get_answer_mutant_id(answers_folder, module)
+        module_to_answer_mutant_id[module] = answer_mutant_id
         sorted_mutant_files = list(sorted(problem_dir.glob("mutant_*.v")))
         weight = compute_problem_weight(sorted_mutant_files[0])
         module_to_weight[module] = weight
@@ -213,18 +714,23 @@ def main(argv: Sequence[str]) -> None:
             print(f"No tb.v found in {problem_dir}, assigning 0 score.")
             module_to_precision[module] = 0
             continue
+        module_to_mutant_files[module] = sorted_mutant_files
 
-        guesses = []
-        for mutant_file in sorted_mutant_files:
-            dependencies = [str(tb_file), str(mutant_file)]
-            passed = is_test_passing(
-                constants.TESTBENCH_MODULE_NAME, dependencies, _INCLUDE_PATHS.value
-            )
-            guesses.append(1 if passed else 0)
+    if _PROFILE_OUTPUT_FOLDER.value is not None:
+        module_to_guesses = evaluate_with_profile(
+            module_to_mutant_files, pathlib.Path(_PROFILE_OUTPUT_FOLDER.value)
+        )
+    elif _MODE.value == "coordinator":
+        module_to_guesses = evaluate_distributed(
+            problems_folder, module_to_mutant_files
+        )
+    else:
+        module_to_guesses = evaluate_locally(module_to_mutant_files)
 
+    for module, guesses in module_to_guesses.items():
         num_positive_guesses = sum(guesses)
-        print(f"Number of positive guesses: {num_positive_guesses}")
-        found_correct = guesses[answer_mutant_id] == 1
+        print(f"Number of positive guesses for {module}: {num_positive_guesses}")
+        found_correct = guesses[module_to_answer_mutant_id[module]] == 1
         if found_correct:
             precision = 1 / num_positive_guesses
         else:
@@ -245,5 +751,25 @@ def main(argv: Sequence[str]) -> None:
         )
 
 
+def main(argv: Sequence[str]) -> None:
+    if len(argv) > 1:
+        raise app.UsageError("Too many command-line arguments.")
+    if _TRACE_FILE.value is not None:
+        tracing.enable(
+            f"run_evaluation {_MODE.value} {socket.gethostname()}:{os.getpid()}"
+        )
+    try:
+        evaluate(pathlib.Path(_PROBLEMS_FOLDER.value))
+    finally:
+        if _TRACE_FILE.value is not None:
+            extra_trace_files = []
+            if _MODE.value == "coordinator":
+                extra_trace_files = [
+                    _local_worker_trace_file(worker_index)
+                    for worker_index in range(_NUM_LOCAL_WORKERS.value)
+                ]
+            tracing.write(_TRACE_FILE.value, extra_trace_files)
+
+
 if __name__ == "__main__":
     app.run(main)
@@ -0,0 +1,27 @@
+"""Plusargs selecting the stimulus shard a simulation runs.
+
+Shared by the testbench generator and the evaluator, so both split the
+stimulus of a generated testbench the same way.
+"""
+
+import constants
+
+
+def shard_plusargs(shard: int, num_shards: int) -> list[str]:
+    """Plusargs selecting one shard of the stimulus of a generated testbench.
+
+    An unsharded run gets no plusargs so it uses the testbench defaults.
+
+    Args:
+      shard: Index of the shard to run.
+      num_shards: Total number of shards.
+
+    Returns:
+      The plusargs to pass to vvp.
+    """
+    if num_shards == 1:
+        return []
+    return [
+        f"+{constants.SHARD_PLUSARG}={shard}",
+        f"+{constants.NUM_SHARDS_PLUSARG}={num_shards}",
+    ]
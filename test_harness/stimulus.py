@@ -0,0 +1,226 @@
+"""Stimulus precomputed with NumPy for the generated testbenches.
+
+Vectors are drawn once per problem, full width and from a fixed seed, and the
+testbenches stream them from a `stimulus_mem` memory instead of calling
+`$random` inside the simulation loop. The same vectors are therefore shared by
+every mutant simulation and can be inspected outside the simulator.
+
+The vectors come in blocks that each start from reset. Sharded simulations
+run whole blocks, so the sequence applied to a design does not depend on the
+number of shards. Random block k is drawn from seed BASE_SEED + k, so adding
+blocks adds stimulus without changing the existing ones.
+
+Random stimulus optionally follows simple protocol constraints:
+  * `*valid`/`*vld` and `*ready`/`*rdy` inputs are asserted with a given
+    probability instead of uniformly,
+  * payload inputs of a valid input only change on vectors where that valid
+    input is asserted. Payload inputs are multi-bit or data-named inputs whose
+    name starts with the valid input's prefix and an underscore, e.g.
+    `push_data` for `push_valid`, or any of them for a bare `valid` input.
+    Single-bit control inputs such as `push_credit_stall` are never held,
+  * the reset input is pulsed with a given probability.
+"""
+
+import os
+from typing import NamedTuple
+
+import numpy as np
+
+# Seed of the first random block, block k uses BASE_SEED + k.
+BASE_SEED = 1
+
+_VALID_SUFFIXES = ("valid", "vld")
+_READY_SUFFIXES = ("ready", "rdy")
+
+
+class Stimulus(NamedTuple):
+    """Precomputed input vectors.
+
+    Attributes:
+      ports: Maps the driven inputs to their widths, in packing order. The first
+        port occupies the most significant bits of a vector.
+      bits: (num_vectors, width) array of 0/1 values, most significant first.
+      words: The vectors as zero-padded hex words, as read by `$readmemh`.
+      block_size: Number of vectors per block, the last block may be shorter.
+    """
+
+    ports: dict[str, int]
+    bits: np.ndarray
+    words: list[str]
+    block_size: int
+
+    @property
+    def width(self) -> int:
+        return self.bits.shape[1]
+
+    @property
+    def num_vectors(self) -> int:
+        return self.bits.shape[0]
+
+    @property
+    def num_blocks(self) -> int:
+        return -(-self.num_vectors // self.block_size)
+
+    def write(self, path: str | os.PathLike) -> None:
+        """Writes the vectors as a `$readmemh` file, one word per line."""
+        with open(path, "w") as f:
+            f.write("\n".join(self.words) + "\n")
+
+
+def to_hex_words(bits: np.ndarray) -> list[str]:
+    """Packs rows of bits into hex words.
+
+    Args:
+      bits: (num_vectors, width) array of 0/1 values, most significant first.
+
+    Returns:
+      One hex word of ceil(width / 4) digits per row.
+    """
+    num_vectors, width = bits.shape
+    digits = max(1, -(-width // 4))
+    padded_width = 8 * -(-digits // 2)
+    padded = np.zeros((num_vectors, padded_width), dtype=np.uint8)
+    padded[:, padded_width - width :] = bits
+    row_digits = padded_width // 4
+    hex_string = np.packbits(padded, axis=1).tobytes().hex()
+    return [
+        hex_string[start + row_digits - digits : start + row_digits]
+        for start in range(0, len(hex_string), row_digits)
+    ]
+
+
+def _make(ports: dict[str, int], bits: np.ndarray, block_size: int) -> Stimulus:
+    return Stimulus(ports, bits, to_hex_words(bits), block_size)
+
+
+def exhaustive_stimulus(ports: dict[str, int], num_blocks: int = 1) -> Stimulus:
+    """Enumerates every combination of the given inputs.
+
+    Vector i holds the value i, so the sweep matches a `{ports} = i` loop.
+
+    Args:
+      ports: Maps the inputs to their widths, in packing order.
+      num_blocks: Number of contiguous blocks the sweep is split into.
+
+    Returns:
+      The 2**width vectors.
+    """
+    width = sum(ports.values())
+    if width > 32:
+        raise ValueError(f"Cannot enumerate {width} input bits.")
+    values = np.arange(1 << width, dtype=">u4").view(np.uint8).reshape(-1, 4)
+    bits = np.unpackbits(values, axis=1)[:, 32 - width :]
+    return _make(dict(ports), bits, max(1, -(-len(bits) // num_blocks)))
+
+
+def _random_bits(rng: np.random.Generator, num_vectors: int, width: int) -> np.ndarray:
+    num_bytes = -(-width // 8)
+    random_bytes = rng.integers(0, 256, size=(num_vectors, num_bytes), dtype=np.uint8)
+    return np.unpackbits(random_bytes, axis=1)[:, 8 * num_bytes - width :]
+
+
+def _hold_unless(bits: np.ndarray, update: np.ndarray) -> np.ndarray:
+    """Keeps each row of `bits` at its last value on rows where `update` is 0."""
+    rows = np.where(update, np.arange(len(update)), 0)
+    return bits[np.maximum.accumulate(rows)]
+
+
+def _handshake_prefix(name: str, suffixes: tuple[str, ...]) -> str | None:
+    for suffix in suffixes:
+        if name.lower().endswith(suffix):
+            return name[: -len(suffix)]
+    return None
+
+
+def _is_payload(name: str, width: int, valid_prefix: str) -> bool:
+    """Returns whether an input is payload of the valid input with this prefix."""
+    if _handshake_prefix(name, _VALID_SUFFIXES + _READY_SUFFIXES) is not None:
+        return False
+    if width == 1 and "data" not in name.lower():
+        return False
+    if not valid_prefix:
+        return True
+    if not valid_prefix.endswith("_"):
+        valid_prefix += "_"
+    return name.startswith(valid_prefix)
+
+
+def _random_block(
+    ports: dict[str, int],
+    num_vectors: int,
+    seed: int,
+    reset_name: str | None,
+    reset_probability: float,
+    valid_probability: float,
+    ready_probability: float,
+) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    columns = {
+        name: _random_bits(rng, num_vectors, width) for name, width in ports.items()
+    }
+
+    valid_prefixes = {}
+    for name, width in ports.items():
+        if width != 1:
+            continue
+        if (prefix := _handshake_prefix(name, _VALID_SUFFIXES)) is not None:
+            columns[name] = (rng.random((num_vectors, 1)) < valid_probability).astype(np.uint8)
+            valid_prefixes[name] = prefix
+        elif _handshake_prefix(name, _READY_SUFFIXES) is not None:
+            columns[name] = (rng.random((num_vectors, 1)) < ready_probability).astype(np.uint8)
+
+    for valid_name, prefix in valid_prefixes.items():
+        for name, width in ports.items():
+            if _is_payload(name, width, prefix):
+                columns[name] = _hold_unless(columns[name], columns[valid_name][:, 0])
+
+    if reset_name is not None and reset_probability > 0:
+        columns[reset_name] = (rng.random((num_vectors, 1)) < reset_probability).astype(np.uint8)
+        ports = {**ports, reset_name: 1}
+
+    if not ports:
+        return np.zeros((num_vectors, 0), dtype=np.uint8)
+    return np.concatenate([columns[name] for name in ports], axis=1)
+
+
+def random_stimulus(
+    ports: dict[str, int],
+    num_vectors: int,
+    num_blocks: int = 1,
+    reset_name: str | None = None,
+    reset_probability: float = 0.0,
+    valid_probability: float = 0.5,
+    ready_probability: float = 0.5,
+) -> Stimulus:
+    """Draws seeded random vectors over the full width of every input.
+
+    Args:
+      ports: Maps the inputs to drive to their widths, in packing order.
+      num_vectors: Number of vectors per block.
+      num_blocks: Number of blocks, block k is drawn from seed BASE_SEED + k.
+      reset_name: Name of the active-high reset input. If set and
+        `reset_probability` is positive, the reset is driven by the stimulus
+        as the last port of every vector.
+      reset_probability: Probability of asserting the reset on a vector.
+      valid_probability: Probability of asserting a valid input.
+      ready_probability: Probability of asserting a ready input.
+
+    Returns:
+      The drawn vectors.
+    """
+    ports = dict(ports)
+    bits = np.concatenate([
+        _random_block(
+            ports,
+            num_vectors,
+            BASE_SEED + block,
+            reset_name,
+            reset_probability,
+            valid_probability,
+            ready_probability,
+        )
+        for block in range(num_blocks)
+    ])
+    if reset_name is not None and reset_probability > 0:
+        ports[reset_name] = 1
+    return _make(ports, bits, num_vectors)
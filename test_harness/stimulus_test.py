@@ -0,0 +1,102 @@
+"""Tests for stimulus.
+
+Run from the test_harness folder:
+python stimulus_test.py
+"""
+
+from absl.testing import absltest
+import numpy as np
+
+import stimulus
+
+# Driven inputs of the credit_receiver problem, without clk and rst.
+_CREDIT_RECEIVER_PORTS = {
+    "credit_initial": 1,
+    "credit_withhold": 1,
+    "pop_credit": 1,
+    "push_credit_stall": 1,
+    "push_data": 8,
+    "push_sender_in_reset": 1,
+    "push_valid": 1,
+}
+
+
+def _bits_value(row: np.ndarray) -> int:
+    return int("".join(map(str, row)) or "0", 2)
+
+
+def _columns(stim: stimulus.Stimulus) -> dict[str, np.ndarray]:
+    columns = {}
+    offset = 0
+    for name, width in stim.ports.items():
+        columns[name] = stim.bits[:, offset : offset + width]
+        offset += width
+    return columns
+
+
+class StimulusTest(absltest.TestCase):
+
+    def test_hex_words_round_trip(self):
+        rng = np.random.default_rng(0)
+        for width in (1, 3, 5, 7, 8, 13, 32, 33, 40, 70):
+            with self.subTest(width=width):
+                bits = rng.integers(0, 2, size=(20, width), dtype=np.uint8)
+                words = stimulus.to_hex_words(bits)
+                self.assertLen(words, 20)
+                for row, word in zip(bits, words):
+                    self.assertLen(word, -(-width // 4))
+                    self.assertEqual(int(word, 16), _bits_value(row))
+
+    def test_exhaustive_stimulus_enumerates_values(self):
+        for ports in ({"a": 1}, {"a": 2, "b": 1}, {"a": 5}, {"a": 4, "b": 3, "c": 6}):
+            with self.subTest(ports=ports):
+                stim = stimulus.exhaustive_stimulus(ports)
+                width = sum(ports.values())
+                self.assertEqual(stim.width, width)
+                self.assertEqual(
+                    [int(word, 16) for word in stim.words], list(range(1 << width))
+                )
+
+    def test_exhaustive_stimulus_over_32_bits_raises(self):
+        with self.assertRaises(ValueError):
+            stimulus.exhaustive_stimulus({"a": 32, "b": 1})
+
+    def test_exhaustive_stimulus_blocks_cover_the_sweep(self):
+        stim = stimulus.exhaustive_stimulus({"a": 5}, num_blocks=3)
+        self.assertEqual(stim.block_size, 11)
+        self.assertEqual(stim.num_blocks, 3)
+        self.assertEqual(stim.num_vectors, 32)
+
+    def test_random_blocks_do_not_depend_on_the_number_of_blocks(self):
+        ports = {"a": 3, "b": 40, "c_valid": 1, "c_data": 8}
+        one_block = stimulus.random_stimulus(ports, 100)
+        for num_blocks in (2, 3, 5):
+            with self.subTest(num_blocks=num_blocks):
+                stim = stimulus.random_stimulus(ports, 100, num_blocks=num_blocks)
+                self.assertEqual(stim.num_blocks, num_blocks)
+                np.testing.assert_array_equal(stim.bits[:100], one_block.bits)
+                self.assertEqual(stim.words[:100], one_block.words)
+        three_blocks = stimulus.random_stimulus(ports, 100, num_blocks=3)
+        five_blocks = stimulus.random_stimulus(ports, 100, num_blocks=5)
+        np.testing.assert_array_equal(five_blocks.bits[:300], three_blocks.bits)
+
+    def test_credit_receiver_payload_holds_while_not_valid(self):
+        stim = stimulus.random_stimulus(
+            _CREDIT_RECEIVER_PORTS, 1000, reset_name="rst", reset_probability=0.01
+        )
+        self.assertEqual(list(stim.ports), [*_CREDIT_RECEIVER_PORTS, "rst"])
+        columns = _columns(stim)
+        valid = columns["push_valid"][1:, 0] == 1
+        data_changed = np.any(columns["push_data"][1:] != columns["push_data"][:-1], axis=1)
+        stall_changed = (
+            columns["push_credit_stall"][1:, 0] != columns["push_credit_stall"][:-1, 0]
+        )
+        self.assertFalse(np.any(data_changed & ~valid))
+        self.assertTrue(np.any(data_changed))
+        # Single-bit control inputs are not payload and keep toggling.
+        self.assertTrue(np.any(stall_changed & ~valid))
+        self.assertTrue(np.any(columns["rst"]))
+
+
+if __name__ == "__main__":
+    absltest.main()
@@ -0,0 +1,133 @@
+r"""Generates testbenches through a running testbench_service.py.
+
+Drop-in replacement of generate_testbenches.py for repeated runs: the client
+only reads the problem files and writes the testbenches, all the heavy
+lifting happens in the already warm service.
+
+python test_harness/testbench_client.py \
+  --problems_folder="${PWD}/visible_problems" \
+  --socket_path=/tmp/testbench_service.sock
+"""
+
+from collections.abc import Sequence
+import itertools
+import json
+import pathlib
+import socket
+
+from absl import app
+from absl import flags
+
+import constants
+
+_PROBLEMS_FOLDER = flags.DEFINE_string(
+    "problems_folder",
+    None,
+    "The path to the problems folder.",
+    required=True,
+)
+_SOCKET_PATH = flags.DEFINE_string(
+    "socket_path",
+    "/tmp/testbench_service.sock",
+    "Path of the Unix socket the service listens on.",
+)
+_NUM_SIMULATION_SHARDS = flags.DEFINE_integer(
+    "num_simulation_shards",
+    1,
+    "Number of stimulus blocks each candidate testbench gets, simulated in parallel.",
+)
+_REPLAY_GOLDEN_TRACE = flags.DEFINE_bool(
+    "replay_golden_trace",
+    False,
+    "Simulate the generated golden module once and check the mutants against "
+    "its recorded output trace instead of simulating it next to every mutant.",
+)
+_TESTBENCH_GENERATION_TIMEOUT_SECONDS = 5 * 60
+# Extra time the client waits for the service to report a generation timeout.
+_RESPONSE_GRACE_SECONDS = 30
+
+_request_ids = itertools.count()
+
+
+class ServiceError(Exception):
+    """The service answered a request with an error."""
+
+
+def call(socket_path: str, method: str, timeout: float, **params):
+    """Sends one JSON-RPC request to the service and waits for its result.
+
+    Args:
+      socket_path: Path of the Unix socket the service listens on.
+      method: Name of the method to call.
+      timeout: Timeout in seconds for connecting and for the answer.
+      **params: Parameters of the method.
+
+    Returns:
+      The result of the call.
+
+    Raises:
+      ServiceError: If the service answered with an error.
+      TimeoutError: If the service did not answer in time.
+      OSError: If the service could not be reached.
+    """
+    request = {
+        "jsonrpc": "2.0",
+        "id": next(_request_ids),
+        "method": method,
+        "params": params,
+    }
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        with sock.makefile("rwb") as stream:
+            stream.write(json.dumps(request).encode() + b"\n")
+            stream.flush()
+            line = stream.readline()
+    if not line:
+        raise ServiceError("The service closed the connection without answering.")
+    response = json.loads(line)
+    if "error" in response:
+        raise ServiceError(response["error"]["message"])
+    return response["result"]
+
+
+def main(argv: Sequence[str]) -> None:
+    if len(argv) > 1:
+        raise app.UsageError("Too many command-line arguments.")
+    problems_folder = pathlib.Path(_PROBLEMS_FOLDER.value)
+    if not problems_folder.is_dir():
+        raise ValueError(
+            f"Problems folder {problems_folder} does not exist or is not a directory."
+        )
+
+    module_names = [f.name for f in problems_folder.iterdir() if f.is_dir()]
+    for module in module_names:
+        problem_dir = problems_folder / module
+        files_dict = {}
+        for file in problem_dir.iterdir():
+            if file.is_file():
+                files_dict[file.name] = file.read_text()
+        try:
+            testbench = call(
+                _SOCKET_PATH.value,
+                "generate_testbench",
+                _TESTBENCH_GENERATION_TIMEOUT_SECONDS + _RESPONSE_GRACE_SECONDS,
+                files=files_dict,
+                num_shards=_NUM_SIMULATION_SHARDS.value,
+                replay_golden_trace=_REPLAY_GOLDEN_TRACE.value,
+                timeout_seconds=_TESTBENCH_GENERATION_TIMEOUT_SECONDS,
+            )
+        except TimeoutError:
+            print(
+                f"Timeout while generating testbench for {module}, using dummy testbench."
+            )
+            testbench = constants.DUMMY_TESTBENCH
+        except ServiceError as e:
+            print(f"Service failed on {module} ({e}), using dummy testbench.")
+            testbench = constants.DUMMY_TESTBENCH
+        testbench_file = problem_dir / constants.TESTBENCH_FILE_NAME
+        testbench_file.write_text(testbench)
+
+
+if __name__ == "__main__":
+    app.run(main)
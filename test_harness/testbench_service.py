@@ -0,0 +1,170 @@
+r"""Long-lived testbench generation service.
+
+Keeps the agent warm between requests: the config, the pooled model server
+connections, the parsed module interfaces and the simulation thread pool are
+set up once instead of on every generate_testbenches.py run. Requests are
+newline-delimited JSON-RPC 2.0 messages on a Unix socket, see
+testbench_client.py for the matching client.
+
+Start the service from the test_harness folder, next to config.yaml:
+python testbench_service.py --socket_path=/tmp/testbench_service.sock
+"""
+
+from collections.abc import Sequence
+import inspect
+import json
+import os
+import socketserver
+import subprocess
+import traceback
+
+from absl import app
+from absl import flags
+
+import agent
+
+_SOCKET_PATH = flags.DEFINE_string(
+    "socket_path",
+    "/tmp/testbench_service.sock",
+    "Path of the Unix socket to listen on.",
+)
+_NUM_SIMULATION_WORKERS = flags.DEFINE_integer(
+    "num_simulation_workers",
+    None,
+    "Size of the simulation thread pool, the number of CPUs by default.",
+)
+_GENERATION_TIMEOUT_SECONDS = flags.DEFINE_float(
+    "generation_timeout_seconds",
+    5 * 60,
+    "Time after which a testbench generation is abandoned and its simulations "
+    "are killed. Requests may ask for a shorter timeout.",
+)
+
+# JSON-RPC 2.0 error codes.
+_PARSE_ERROR = -32700
+_INVALID_REQUEST = -32600
+_METHOD_NOT_FOUND = -32601
+_INVALID_PARAMS = -32602
+_INTERNAL_ERROR = -32603
+# Server errors, in the range JSON-RPC reserves for implementations.
+_TIMEOUT_ERROR = -32000
+
+
+def _generate_testbench(
+    files: dict[str, str],
+    num_shards: int = 1,
+    replay_golden_trace: bool = False,
+    timeout_seconds: float | None = None,
+) -> str:
+    timeout = _GENERATION_TIMEOUT_SECONDS.value
+    if timeout_seconds is not None:
+        timeout = min(timeout, timeout_seconds)
+    return agent.generate_testbench(
+        files,
+        num_shards=num_shards,
+        replay_golden_trace=replay_golden_trace,
+        timeout=timeout,
+    )
+
+
+def _ping() -> str:
+    return "pong"
+
+
+_METHODS = {
+    "generate_testbench": _generate_testbench,
+    "ping": _ping,
+}
+
+
+def handle_request(line: bytes) -> dict:
+    """Runs one JSON-RPC request and returns the response message.
+
+    Args:
+      line: The encoded request.
+
+    Returns:
+      The JSON-RPC response, with either a result or an error.
+    """
+    try:
+        request = json.loads(line)
+    except ValueError as e:
+        return {
+            "jsonrpc": "2.0",
+            "id": None,
+            "error": {"code": _PARSE_ERROR, "message": str(e)},
+        }
+    if not isinstance(request, dict):
+        return {
+            "jsonrpc": "2.0",
+            "id": None,
+            "error": {"code": _INVALID_REQUEST, "message": "Request is not an object."},
+        }
+    response = {"jsonrpc": "2.0", "id": request.get("id")}
+    params = request.get("params", {})
+    if not isinstance(params, dict):
+        response["error"] = {
+            "code": _INVALID_PARAMS,
+            "message": "Params must be an object.",
+        }
+        return response
+    method = _METHODS.get(request.get("method"))
+    if method is None:
+        response["error"] = {
+            "code": _METHOD_NOT_FOUND,
+            "message": f"Unknown method {request.get('method')!r}.",
+        }
+        return response
+    try:
+        inspect.signature(method).bind(**params)
+    except TypeError as e:
+        response["error"] = {"code": _INVALID_PARAMS, "message": str(e)}
+        return response
+    try:
+        response["result"] = method(**params)
+    except (TimeoutError, subprocess.TimeoutExpired) as e:
+        response["error"] = {"code": _TIMEOUT_ERROR, "message": f"Timeout: {e}"}
+    except Exception as e:  # pylint: disable=broad-except
+        traceback.print_exc()
+        response["error"] = {
+            "code": _INTERNAL_ERROR,
+            "message": f"{type(e).__name__}: {e}",
+        }
+    return response
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Answers every request line of a connection."""
+
+    def handle(self):
+        for line in self.rfile:
+            if line.strip():
+                response = handle_request(line)
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+                self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def main(argv: Sequence[str]) -> None:
+    if len(argv) > 1:
+        raise app.UsageError("Too many command-line arguments.")
+    # Set up the warm state before accepting the first request.
+    agent.load_config("config.yaml")
+    agent.get_simulation_pool(_NUM_SIMULATION_WORKERS.value)
+
+    socket_path = _SOCKET_PATH.value
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    with _Server(socket_path, _RequestHandler) as server:
+        print(f"Testbench service listening on {socket_path}")
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    app.run(main)
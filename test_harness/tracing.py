@@ -0,0 +1,209 @@
+"""Opt-in timeline tracing in the Chrome trace event format.
+
+Tracing is disabled until `enable` is called, in which case `span` and
+`run_subprocess` cost next to nothing. Enabled, they record complete ("X")
+events with wall time, thread CPU time and, for jobs handed to a pool or a
+queue, the time spent waiting before they started. Subprocess events carry the
+child pid and its CPU time. The resulting file opens in chrome://tracing and
+https://ui.perfetto.dev.
+"""
+
+from collections.abc import Iterator, Sequence
+import contextlib
+import json
+import os
+import pathlib
+import subprocess
+import threading
+import time
+
+_lock = threading.Lock()
+_events = None
+
+
+def enable(process_name: str) -> None:
+    """Starts recording events for this process.
+
+    Args:
+      process_name: Name shown for this process in the trace viewer.
+    """
+    global _events
+    with _lock:
+        _events = [
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": os.getpid(),
+                "args": {"name": process_name},
+            }
+        ]
+
+
+def is_enabled() -> bool:
+    """Returns whether events are being recorded."""
+    return _events is not None
+
+
+def now() -> float:
+    """Returns the current wall time in seconds, e.g. to mark a job as queued."""
+    return time.time()
+
+
+def _add_event(
+    name: str, category: str, start: float, end: float, args: dict
+) -> None:
+    event = {
+        "name": name,
+        "cat": category,
+        "ph": "X",
+        "ts": start * 1e6,
+        "dur": (end - start) * 1e6,
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+        "args": args,
+    }
+    with _lock:
+        if _events is not None:
+            _events.append(event)
+
+
+@contextlib.contextmanager
+def span(
+    name: str, category: str = "stage", queued_at: float | None = None, **args
+) -> Iterator[None]:
+    """Records the enclosed code as one event.
+
+    Args:
+      name: Name of the event.
+      category: Category of the event, e.g. 'stage' or 'subprocess'.
+      queued_at: Wall time at which the work was queued, if it was queued.
+      **args: Extra values shown with the event.
+    """
+    if _events is None:
+        yield
+        return
+    start = time.time()
+    cpu_start = time.thread_time()
+    try:
+        yield
+    finally:
+        args["thread_cpu_ms"] = (time.thread_time() - cpu_start) * 1e3
+        if queued_at is not None:
+            args["queue_wait_ms"] = (start - queued_at) * 1e3
+        _add_event(name, category, start, time.time(), args)
+
+
+def _read_into(stream, outputs: dict, name: str) -> None:
+    outputs[name] = stream.read()
+
+
+def run_subprocess(
+    cmd: Sequence[str],
+    name: str | None = None,
+    queued_at: float | None = None,
+    check: bool = False,
+    timeout: float | None = None,
+    **kwargs,
+) -> subprocess.CompletedProcess:
+    """Drop-in replacement of `subprocess.run` that records the child.
+
+    The child is reaped here with `os.wait4` rather than by `Popen`, which
+    gives its own resource usage even while other threads run subprocesses.
+
+    Args:
+      cmd: The command to run.
+      name: Name of the event, the executable name by default.
+      queued_at: Wall time at which the command was queued, if it was queued.
+      check: Raise CalledProcessError if the command fails.
+      timeout: Timeout in seconds, see `subprocess.run`.
+      **kwargs: Passed to `subprocess.Popen`; `capture_output` is supported.
+
+    Returns:
+      The completed process.
+
+    Raises:
+      subprocess.TimeoutExpired: If the command timed out.
+      subprocess.CalledProcessError: If `check` is set and the command failed.
+    """
+    if _events is None:
+        return subprocess.run(cmd, check=check, timeout=timeout, **kwargs)
+    if kwargs.pop("capture_output", False):
+        kwargs["stdout"] = subprocess.PIPE
+        kwargs["stderr"] = subprocess.PIPE
+    args = {"cmd": " ".join(cmd)}
+    if queued_at is not None:
+        args["queue_wait_ms"] = (time.time() - queued_at) * 1e3
+    start = time.time()
+    with subprocess.Popen(cmd, **kwargs) as process:
+        args["child_pid"] = process.pid
+        outputs = {}
+        readers = [
+            threading.Thread(target=_read_into, args=(stream, outputs, stream_name))
+            for stream_name, stream in [("stdout", process.stdout), ("stderr", process.stderr)]
+            if stream is not None
+        ]
+        for reader in readers:
+            reader.start()
+
+        # The timeout kills the child only while it is not reaped, so the pid
+        # cannot have been reused by another process.
+        kill_lock = threading.Lock()
+        state = {"exited": False, "timed_out": False}
+
+        def _kill():
+            with kill_lock:
+                if not state["exited"]:
+                    state["timed_out"] = True
+                    process.kill()
+
+        timer = None
+        if timeout is not None:
+            timer = threading.Timer(timeout, _kill)
+            timer.start()
+        os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+        with kill_lock:
+            state["exited"] = True
+        if timer is not None:
+            timer.cancel()
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        for reader in readers:
+            reader.join()
+
+        args["child_user_cpu_ms"] = rusage.ru_utime * 1e3
+        args["child_system_cpu_ms"] = rusage.ru_stime * 1e3
+        args["child_max_rss_kb"] = rusage.ru_maxrss
+        args["returncode"] = process.returncode
+        if state["timed_out"]:
+            args["timed_out"] = True
+        _add_event(
+            name or os.path.basename(cmd[0]), "subprocess", start, time.time(), args
+        )
+    stdout, stderr = outputs.get("stdout"), outputs.get("stderr")
+    if state["timed_out"]:
+        raise subprocess.TimeoutExpired(cmd, timeout, output=stdout, stderr=stderr)
+    if check and process.returncode:
+        raise subprocess.CalledProcessError(
+            process.returncode, cmd, output=stdout, stderr=stderr
+        )
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+
+def write(path: str | os.PathLike, extra_trace_files: Sequence[str] = ()) -> None:
+    """Writes the recorded events, merged with other trace files, to `path`.
+
+    Args:
+      path: Destination of the trace.
+      extra_trace_files: Traces written by other processes, e.g. local workers.
+        Missing files are skipped.
+    """
+    with _lock:
+        events = list(_events or [])
+    for extra_trace_file in extra_trace_files:
+        extra_trace_file = pathlib.Path(extra_trace_file)
+        if extra_trace_file.exists():
+            events.extend(json.loads(extra_trace_file.read_text())["traceEvents"])
+    pathlib.Path(path).write_text(
+        json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
+    )
+    print(f"Trace with {len(events)} events written to {path}")